@@ -1,4 +1,5 @@
-import os, subprocess, time
+import os, subprocess, time, shutil, mmap, functools, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
 from benbiohelpers.FileSystemHandling.DirectoryHandling import checkDirs, getIsolatedParentDir
 from benbiohelpers.CustomErrors import InvalidPathError, UserInputError
@@ -7,10 +8,55 @@ from benbiohelpers.InputParsing.CheckForNumber import checkForNumber
 from typing import List
 
 
+# Counts the number of reads in the given fastq file (gzipped or not).
+# Uncompressed files are memory-mapped and scanned for newlines directly.
+# Decompression is handed off to rapidgzip or pigz when available so that it can make use of multiple threads,
+# falling back to zcat otherwise. Newlines are counted directly from the decompressed stream.
+# The newline count is rounded to the nearest multiple of 4 in case the last line has no trailing newline.
+# If a stopEvent (threading.Event) is given and gets set, counting stops early (killing any decompression) and None is returned.
+def countFastqReads(fastqFilePath, threads = 1, stopEvent: threading.Event = None):
+
+    if not fastqFilePath.endswith(".gz"):
+        if os.path.getsize(fastqFilePath) == 0: return 0
+        lineCount = 0
+        with open(fastqFilePath, "rb") as fastqFile:
+            with mmap.mmap(fastqFile.fileno(), 0, access = mmap.ACCESS_READ) as mappedFastqFile:
+                for i in range(0, len(mappedFastqFile), 1<<24):
+                    if stopEvent is not None and stopEvent.is_set(): return None
+                    lineCount += mappedFastqFile[i:i+(1<<24)].count(b'\n')
+        return (lineCount+2)//4
+
+    if shutil.which("rapidgzip") is not None:
+        decompressionArguments = ("rapidgzip", "-d", "-c", "-P", str(threads), fastqFilePath)
+    elif shutil.which("pigz") is not None:
+        decompressionArguments = ("pigz", "-cd", "-p", str(threads), fastqFilePath)
+    else: decompressionArguments = ("zcat", fastqFilePath)
+
+    lineCount = 0
+    with subprocess.Popen(decompressionArguments, stdout = subprocess.PIPE) as decompressionProcess:
+        while chunk := decompressionProcess.stdout.read(1<<20):
+            if stopEvent is not None and stopEvent.is_set():
+                decompressionProcess.kill()
+                return None
+            lineCount += chunk.count(b'\n')
+    if decompressionProcess.returncode != 0:
+        raise subprocess.CalledProcessError(decompressionProcess.returncode, decompressionArguments)
+
+    return (lineCount+2)//4
+
+
+# Retrieves the version information for the given bowtie2 binary (or the default binary if None).
+# The result is cached, since the binary is not expected to change over the course of a run.
+@functools.lru_cache(maxsize = None)
+def getBowtie2Version(bowtie2BinaryPath = None):
+    if bowtie2BinaryPath is None: bowtie2BinaryPath = "bowtie2"
+    return subprocess.check_output((bowtie2BinaryPath,"--version"), encoding=("utf-8"))
+
+
 # Write metadata on the parameters for the alignment, for future reference.
 def writeMetadata(rawReadsFilePath: str, pairedEndAlignment, bowtie2IndexBasenamePath,
                   adapterSequencesFilePath = None, bowtie2Version = None, customBowtie2Arguments = None,
-                  trimmer = None):
+                  trimmer = None, bowtie2BinaryPath = None):
 
     if pairedEndAlignment: basename = os.path.basename(rawReadsFilePath).rsplit('_', 1)[0]
     else: basename = os.path.basename(rawReadsFilePath).rsplit(".fastq", 1)[0]
@@ -18,7 +64,7 @@ def writeMetadata(rawReadsFilePath: str, pairedEndAlignment, bowtie2IndexBasenam
     metadataFilePath = os.path.join(os.path.dirname(rawReadsFilePath),".metadata",f"{basename}_alignment.metadata")
     with open(metadataFilePath, 'w') as metadataFile:
 
-        if bowtie2Version is None: bowtie2Version = subprocess.check_output(("bowtie2","--version"), encoding=("utf-8"))
+        if bowtie2Version is None: bowtie2Version = getBowtie2Version(bowtie2BinaryPath)
 
         metadataFile.write("Path_to_Index:\n" + bowtie2IndexBasenamePath + "\n\n")
         if adapterSequencesFilePath is not None:
@@ -28,106 +74,70 @@ def writeMetadata(rawReadsFilePath: str, pairedEndAlignment, bowtie2IndexBasenam
             metadataFile.write("Trimmer:\n" + trimmer + "\n\n")
             metadataFile.write("Trimming_Stats:\n")
             trimmingStatsFilePath = os.path.join(os.path.dirname(rawReadsFilePath),".tmp",f"{basename}_trimming_stats.txt")
-            with open(trimmingStatsFilePath, 'r') as trimmingStatsFile:
-                for line in trimmingStatsFile: metadataFile.write(line)
+            with open(trimmingStatsFilePath, 'r') as trimmingStatsFile: metadataFile.write(trimmingStatsFile.read())
             metadataFile.write('\n')
             os.remove(trimmingStatsFilePath)
 
         metadataFile.write("Bowtie2_Version:\n" + bowtie2Version + "\n")
         metadataFile.write("Bowtie2_Stats:\n")
         bowtie2StatsFilePath = os.path.join(os.path.dirname(rawReadsFilePath),".tmp",f"{basename}_bowtie2_stats.txt")
-        with open(bowtie2StatsFilePath, 'r') as bowtie2StatsFile:
-            atStats = False
-            for line in bowtie2StatsFile:
-                if not atStats and line.endswith("reads; of these:\n"): atStats = True
-                if atStats: metadataFile.write(line)
-            if not atStats: raise InvalidPathError("Malformed bowtie2 stats.")
+        with open(bowtie2StatsFilePath, 'r') as bowtie2StatsFile: bowtie2Stats = bowtie2StatsFile.read()
+        # Write everything from the start of the line ending in "reads; of these:" onward.
+        statsStart = bowtie2Stats.find("reads; of these:\n")
+        if statsStart == -1: raise InvalidPathError("Malformed bowtie2 stats.")
+        metadataFile.write(bowtie2Stats[bowtie2Stats.rfind('\n', 0, statsStart)+1:])
         metadataFile.write('\n')
         os.remove(bowtie2StatsFilePath)
         if customBowtie2Arguments is not None and customBowtie2Arguments:
             metadataFile.write(f"Custom_Bowtie2_arguments: {customBowtie2Arguments}\n\n")
 
 
-# For each of the given reads files, run the accompyaning bash script to perform the alignment.
-def alignReads(rawReadsFilePaths: List[str], bowtie2IndexBasenamePath, adapterSequencesFilePath = None, 
-               readCountsOutputFilePath = None, bowtie2BinaryPath = None, threads = 1, customBowtie2Arguments = '',
-               findAdapters = False, pairedEndAlignment = False, interleavedPairedEndFiles = False,
-               pipelineEndpoint = ".bed", retainSamOutput = False, legacyTrimming = False, findAdaptersSearchLengthLimit = None):
+# Aligns a single reads file (or file pair, if pairedReadsFilePath is given) by running the accompanying bash script.
+# Returns the path to the output file and a dictionary of read counts for the original file(s) (empty unless countReads is True).
+def alignReadsFile(rawReadsFilePath, pairedReadsFilePath, currentReadFileNum, totalReadsFiles, scriptStartTime,
+                   bowtie2IndexBasenamePath, adapterSequencesFilePath = None, countReads = False, bowtie2BinaryPath = None,
+                   threads = 1, customBowtie2Arguments = '', findAdapters = False, pairedEndAlignment = False,
+                   interleavedPairedEndFiles = False, pipelineEndpoint = ".bed", retainSamOutput = False,
+                   legacyTrimming = False, findAdaptersSearchLengthLimit = None):
 
     # Get the bash alignment script file path.
     alignmentBashScriptFilePath = os.path.join(os.path.dirname(__file__),"ParseRawReadsToBed.bash")
 
-    # Make sure a valid pipelineEndpoint was given.
-    if pipelineEndpoint not in (".bed", ".bed.gz", ".sam", ".sam.gz"):
-        raise UserInputError(f"Unrecognized pipeline endpoint given: {pipelineEndpoint}\n"
-                             'Expected ".bed", ".bed.gz", ".sam", or ".sam.gz"')
-
-    # If performing paired end alignment, find pairs for all the given raw reads files.
-    if pairedEndAlignment and not interleavedPairedEndFiles:
-        read1FilePaths: List[str] = list(); read2FilePaths: List[str] = list()
-        for rawReadsFilePath in rawReadsFilePaths:
-
-            # It's possible we have already assigned this file path as a pair of a previous path. Double check!
-            if rawReadsFilePath in read1FilePaths or rawReadsFilePath in read2FilePaths: continue
-
-            # Find the pair and assign each pair to their respective list.
-            baseName = rawReadsFilePath.rsplit(".fastq",1)[0]
-            if baseName.endswith("_1") or baseName.endswith("_R1"):
-                read1FilePaths.append(rawReadsFilePath)
-                pairedBaseName = baseName[:-1] + '2'
-                pairedList = read2FilePaths
-            elif baseName.endswith("_2") or baseName.endswith("_R2"):
-                read2FilePaths.append(rawReadsFilePath)
-                pairedBaseName = baseName[:-1] + '1'
-                pairedList = read1FilePaths
-            else: raise InvalidPathError(rawReadsFilePath, "Given path does not end with \"_1\", \"_R1\", \"_2\" or \"_R2\" "
-                                                           "(prior to file extension; e.g. my_reads_2.fastq.gz is valid.)")
-
-            pairFound = False
-            for fileExtension in (".fastq", ".fastq.gz"):
-                pairedFilePath = pairedBaseName + fileExtension
-                if os.path.exists(pairedFilePath): 
-                    pairedList.append(pairedFilePath)
-                    print(f"Found fastq file pair with basename: {os.path.basename(pairedBaseName).rsplit('_',1)[0]}")
-                    pairFound = True
-                    break
-
-            if not pairFound: raise InvalidPathError(rawReadsFilePath, "No matching pair found. Expected paired files (in same "
-                                                                       "directory) ending in \"1\" and \"2\", but only found:")
-
-        rawReadsFilePaths = read1FilePaths
-
-    readCounts = dict()
-    scriptStartTime = time.time()
-    currentReadFileNum = 0
-    totalReadsFiles = len(rawReadsFilePaths)
-    outputFilePaths = list()
-
-    for i, rawReadsFilePath in enumerate(rawReadsFilePaths):
-
-        # Print information about the current file
-        currentReadFileNum += 1
-        readsFileStartTime = time.time()
-        print()
-        if pairedEndAlignment: 
-            print(f"Processing file pair with basename {os.path.basename(rawReadsFilePath).rsplit('_',1)[0]}")
-        else: print("Processing file",os.path.basename(rawReadsFilePath))
-        print('(',currentReadFileNum,'/',totalReadsFiles,')', sep = '') 
-
-        # If requested find adapters in the current fastq file(s) based on the given list of adapters.
-        try:
-            if findAdapters and not pairedEndAlignment:
-                thisAdapterSequencesFilePath = findAdaptersFunc([rawReadsFilePath], adapterSequencesFilePath,
-                                                                searchLengthLimit = findAdaptersSearchLengthLimit)[0]
-            elif findAdapters and pairedEndAlignment:
-                thisAdapterSequencesFilePath = findAdaptersFunc([read1FilePaths[i], read2FilePaths[i]],
-                                                                adapterSequencesFilePath, aggregateOutput = True,
-                                                                searchLengthLimit = findAdaptersSearchLengthLimit)[0]
-            else: thisAdapterSequencesFilePath = adapterSequencesFilePath
-        except NoEnrichedAdapterError:
-            print("WARNING: None of the given adapters are enriched. Reads will not be trimmed. "
-                  "(If you believe you have the right sequences, consider using a sequence search limit.)")
-            thisAdapterSequencesFilePath = None
+    # Print information about the current file
+    readsFileStartTime = time.time()
+    print()
+    if pairedEndAlignment: 
+        print(f"Processing file pair with basename {os.path.basename(rawReadsFilePath).rsplit('_',1)[0]}")
+    else: print("Processing file",os.path.basename(rawReadsFilePath))
+    print('(',currentReadFileNum,'/',totalReadsFiles,')', sep = '') 
+
+    # If requested find adapters in the current fastq file(s) based on the given list of adapters.
+    try:
+        if findAdapters and pairedReadsFilePath is None:
+            thisAdapterSequencesFilePath = findAdaptersFunc([rawReadsFilePath], adapterSequencesFilePath,
+                                                            searchLengthLimit = findAdaptersSearchLengthLimit)[0]
+        elif findAdapters:
+            thisAdapterSequencesFilePath = findAdaptersFunc([rawReadsFilePath, pairedReadsFilePath],
+                                                            adapterSequencesFilePath, aggregateOutput = True,
+                                                            searchLengthLimit = findAdaptersSearchLengthLimit)[0]
+        else: thisAdapterSequencesFilePath = adapterSequencesFilePath
+    except NoEnrichedAdapterError:
+        print("WARNING: None of the given adapters are enriched. Reads will not be trimmed. "
+              "(If you believe you have the right sequences, consider using a sequence search limit.)")
+        thisAdapterSequencesFilePath = None
+
+    # If requested, start counting the number of reads in the original input file(s) in the background so that
+    # the count is ready by the time the alignment finishes. (Only one decompression thread is used, since the
+    # alignment itself is using the given number of threads.)
+    # If the alignment fails, the counting is stopped so that the error isn't held up waiting on it.
+    if countReads:
+        stopReadCounting = threading.Event()
+        readCountExecutor = ThreadPoolExecutor(max_workers = 2)
+        readCountFutures = {os.path.basename(filePath):readCountExecutor.submit(countFastqReads, filePath, stopEvent = stopReadCounting)
+                            for filePath in (rawReadsFilePath, pairedReadsFilePath) if filePath is not None}
+        readCountExecutor.shutdown(wait = False)
+
+    try:
 
         # Make sure the .tmp directory exists and create a path to the bowtie2 stats file.
         tempDir = os.path.join(os.path.dirname(rawReadsFilePath),".tmp")
@@ -135,7 +145,7 @@ def alignReads(rawReadsFilePaths: List[str], bowtie2IndexBasenamePath, adapterSe
 
         # Run the alignment script.
         if pairedEndAlignment and not interleavedPairedEndFiles:
-            arguments = ["bash", alignmentBashScriptFilePath, "-1", read1FilePaths[i], "-2", read2FilePaths[i]]
+            arguments = ["bash", alignmentBashScriptFilePath, "-1", rawReadsFilePath, "-2", pairedReadsFilePath]
         elif pairedEndAlignment and interleavedPairedEndFiles:
             arguments = ["bash", alignmentBashScriptFilePath, "-1", rawReadsFilePath, "--interleaved"]
         else:
@@ -151,43 +161,84 @@ def alignReads(rawReadsFilePaths: List[str], bowtie2IndexBasenamePath, adapterSe
             trimmer = "bbduk"
         subprocess.run(arguments, check = True)
 
-        # If requested, count the number of reads in the original input file(s).
-        if readCountsOutputFilePath is not None:
-            print("Counting reads in original reads file(s)...")
-
-            zcatProcess = subprocess.Popen(("zcat", rawReadsFilePath), stdout = subprocess.PIPE)
-            readCountProcess = subprocess.Popen(("wc", "-l"), stdin = zcatProcess.stdout, stdout = subprocess.PIPE)
-            readCount = readCountProcess.communicate()[0].decode("utf8")
-            readCounts[os.path.basename(rawReadsFilePath)] = str( round(int(readCount)/4) )
+    except BaseException:
+        if countReads:
+            stopReadCounting.set()
+            for readCountFuture in readCountFutures.values(): readCountFuture.cancel()
+        raise
 
-            if pairedEndAlignment:
-                zcatProcess = subprocess.Popen(("zcat", read2FilePaths[i]), stdout = subprocess.PIPE)
-                readCountProcess = subprocess.Popen(("wc", "-l"), stdin = zcatProcess.stdout, stdout = subprocess.PIPE)
-                readCount = readCountProcess.communicate()[0].decode("utf8")
-                readCounts[os.path.basename(read2FilePaths[i])] = str( round(int(readCount)/4) )
+    # Retrieve the read counts, if requested.
+    readCounts = dict()
+    if countReads:
+        print("Counting reads in original reads file(s)...")
+        for readsFileBasename, readCountFuture in readCountFutures.items():
+            readCounts[readsFileBasename] = str(readCountFuture.result())
+
+    # Output information on time elapsed.
+    if pairedEndAlignment:
+        print(f"Time taken to align reads in this file pair: {time.time() - readsFileStartTime} seconds")
+    else:
+        print(f"Time taken to align reads in this file: {time.time() - readsFileStartTime} seconds")
+    print(f"Total time spent aligning across all files: {time.time() - scriptStartTime} seconds")
 
-        # Output information on time elapsed.
-        if pairedEndAlignment:
-            print(f"Time taken to align reads in this file pair: {time.time() - readsFileStartTime} seconds")
+    # Write the metadata.
+    if thisAdapterSequencesFilePath is not None:
+        if legacyTrimming:
+            trimmer = "trimmomatic"
         else:
-            print(f"Time taken to align reads in this file: {time.time() - readsFileStartTime} seconds")
-        print(f"Total time spent aligning across all files: {time.time() - scriptStartTime} seconds")
-
-        # Write the metadata.
-        if thisAdapterSequencesFilePath is not None:
-            if legacyTrimming:
-                trimmer = "trimmomatic"
-            else:
-                trimmer = "bbduk"
-        else: trimmer = None
-        writeMetadata(rawReadsFilePath, pairedEndAlignment, bowtie2IndexBasenamePath, 
-                      thisAdapterSequencesFilePath, bowtie2BinaryPath, customBowtie2Arguments,
-                      trimmer)
-
-        # Add the output file path to the list
-        if pairedEndAlignment: readsBasePath = read1FilePaths[i].rsplit(".fastq", 1)[0].rsplit('_', 1)[0]
-        else: readsBasePath = rawReadsFilePath.rsplit(".fastq", 1)[0]
-        outputFilePaths.append(readsBasePath + pipelineEndpoint)
+            trimmer = "bbduk"
+    else: trimmer = None
+    writeMetadata(rawReadsFilePath, pairedEndAlignment, bowtie2IndexBasenamePath, 
+                  thisAdapterSequencesFilePath, customBowtie2Arguments = customBowtie2Arguments,
+                  trimmer = trimmer, bowtie2BinaryPath = bowtie2BinaryPath)
+
+    # Return the output file path alongside any read counts.
+    if pairedEndAlignment: readsBasePath = rawReadsFilePath.rsplit(".fastq", 1)[0].rsplit('_', 1)[0]
+    else: readsBasePath = rawReadsFilePath.rsplit(".fastq", 1)[0]
+    return readsBasePath + pipelineEndpoint, readCounts
+
+
+# For each of the given reads files, run the accompyaning bash script to perform the alignment.
+def alignReads(rawReadsFilePaths: List[str], bowtie2IndexBasenamePath, adapterSequencesFilePath = None, 
+               readCountsOutputFilePath = None, bowtie2BinaryPath = None, threads = 1, customBowtie2Arguments = '',
+               findAdapters = False, pairedEndAlignment = False, interleavedPairedEndFiles = False,
+               pipelineEndpoint = ".bed", retainSamOutput = False, legacyTrimming = False, findAdaptersSearchLengthLimit = None,
+               fileParallelism = 1):
+
+    # Make sure a valid pipelineEndpoint was given.
+    if pipelineEndpoint not in (".bed", ".bed.gz", ".sam", ".sam.gz"):
+        raise UserInputError(f"Unrecognized pipeline endpoint given: {pipelineEndpoint}\n"
+                             'Expected ".bed", ".bed.gz", ".sam", or ".sam.gz"')
+
+    # If performing paired end alignment, find pairs for all the given raw reads files.
+    if pairedEndAlignment and not interleavedPairedEndFiles:
+        rawReadsFilePaths, read2FilePaths = findPairedReadsFiles(rawReadsFilePaths)
+
+    readCounts = dict()
+    scriptStartTime = time.time()
+    totalReadsFiles = len(rawReadsFilePaths)
+    outputFilePaths = list()
+
+    # Pair each reads file with its mate (if applicable) and the arguments shared by all alignments.
+    alignmentArguments = [(rawReadsFilePath, read2FilePaths[i] if pairedEndAlignment and not interleavedPairedEndFiles else None,
+                           i+1, totalReadsFiles, scriptStartTime, bowtie2IndexBasenamePath, adapterSequencesFilePath,
+                           readCountsOutputFilePath is not None, bowtie2BinaryPath, threads, customBowtie2Arguments,
+                           findAdapters, pairedEndAlignment, interleavedPairedEndFiles, pipelineEndpoint,
+                           retainSamOutput, legacyTrimming, findAdaptersSearchLengthLimit)
+                          for i, rawReadsFilePath in enumerate(rawReadsFilePaths)]
+
+    # Align the reads files one at a time, or across multiple processes if requested.
+    # NOTE: Each alignment still uses the given number of threads, so fileParallelism*threads should not exceed
+    #       the number of available cores.
+    if fileParallelism > 1 and totalReadsFiles > 1:
+        with ProcessPoolExecutor(max_workers = fileParallelism) as executor:
+            alignmentFutures = [executor.submit(alignReadsFile, *arguments) for arguments in alignmentArguments]
+            alignmentResults = [alignmentFuture.result() for alignmentFuture in alignmentFutures]
+    else: alignmentResults = [alignReadsFile(*arguments) for arguments in alignmentArguments]
+
+    for outputFilePath, fileReadCounts in alignmentResults:
+        outputFilePaths.append(outputFilePath)
+        readCounts.update(fileReadCounts)
 
     # Write the read counts if requested.
     if readCountsOutputFilePath is not None:
@@ -198,6 +249,51 @@ def alignReads(rawReadsFilePaths: List[str], bowtie2IndexBasenamePath, adapterSe
     return outputFilePaths
 
 
+# Finds the mate for each of the given paired-end reads files (in the same directory, ending in "1" and "2"
+# prior to the file extension). Returns a list of read 1 file paths and a list of their corresponding read 2 file paths.
+def findPairedReadsFiles(rawReadsFilePaths: List[str]):
+
+    read1FilePaths: List[str] = list(); read2FilePaths: List[str] = list()
+    assignedFilePaths = set()
+    directoryContents = dict() # Caches the file names in each directory, so they only need to be listed once.
+    for rawReadsFilePath in rawReadsFilePaths:
+
+        # It's possible we have already assigned this file path as a pair of a previous path. Double check!
+        if rawReadsFilePath in assignedFilePaths: continue
+
+        # Find the pair and assign each pair to their respective list.
+        baseName = rawReadsFilePath.rsplit(".fastq",1)[0]
+        if baseName.endswith("_1") or baseName.endswith("_R1"):
+            read1FilePaths.append(rawReadsFilePath)
+            pairedBaseName = baseName[:-1] + '2'
+            pairedList = read2FilePaths
+        elif baseName.endswith("_2") or baseName.endswith("_R2"):
+            read2FilePaths.append(rawReadsFilePath)
+            pairedBaseName = baseName[:-1] + '1'
+            pairedList = read1FilePaths
+        else: raise InvalidPathError(rawReadsFilePath, "Given path does not end with \"_1\", \"_R1\", \"_2\" or \"_R2\" "
+                                                       "(prior to file extension; e.g. my_reads_2.fastq.gz is valid.)")
+
+        pairFound = False
+        pairedDirectory = os.path.dirname(pairedBaseName)
+        if pairedDirectory not in directoryContents:
+            with os.scandir(pairedDirectory if pairedDirectory else '.') as directoryEntries:
+                directoryContents[pairedDirectory] = {directoryEntry.name for directoryEntry in directoryEntries}
+        for fileExtension in (".fastq", ".fastq.gz"):
+            pairedFilePath = pairedBaseName + fileExtension
+            if os.path.basename(pairedFilePath) in directoryContents[pairedDirectory]: 
+                pairedList.append(pairedFilePath)
+                assignedFilePaths.add(rawReadsFilePath); assignedFilePaths.add(pairedFilePath)
+                print(f"Found fastq file pair with basename: {os.path.basename(pairedBaseName).rsplit('_',1)[0]}")
+                pairFound = True
+                break
+
+        if not pairFound: raise InvalidPathError(rawReadsFilePath, "No matching pair found. Expected paired files (in same "
+                                                                   "directory) ending in \"1\" and \"2\", but only found:")
+
+    return read1FilePaths, read2FilePaths
+
+
 # Removes trimmed reads file paths from a list of fastq reads file paths.
 # Returns the filtered list of file paths. Does not alter the original list.
 def removeTrimmedAndTmp(unfilteredReadsFilePaths: List[str]):
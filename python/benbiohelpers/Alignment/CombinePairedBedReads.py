@@ -1,8 +1,9 @@
 # Takes a bed file of paired-end reads and combines reads that aligned concordantly.
-import os, subprocess
+import os, subprocess, shutil, gzip
+from contextlib import contextmanager
 from enum import Enum
 from typing import List
-from benbiohelpers.CustomErrors import UnsortedInputError
+from benbiohelpers.CustomErrors import UnsortedInputError, UserInputError
 from benbiohelpers.FileSystemHandling.DirectoryHandling import getTempDir
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
 from benbiohelpers.InputParsing.CheckForNumber import checkForNumber
@@ -14,104 +15,191 @@ class CombinationMethod(Enum):
     LONGEST_READ = 3
 
 
+# The file extensions associated with each supported output compression program.
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "bgzip": ".gz", "zstd": ".zst"}
+
+# The expected sorting for paired reads, and how to achieve it. Read IDs are compared in byte order, which is the only
+# ordering that guarantees mates are adjacent. (Locale-aware sorting may place e.g. "SRR1.11/1" between "SRR1.1/1" and "SRR1.1/2".)
+EXPECTED_READ_ID_SORTING = ("Expected sorting based on readID, in byte order. "
+                            "Please sort the file with \"LC_ALL=C sort -k4,4 -s\" (plain \"sort -k4,4\" may use a different order).")
+
+
+@contextmanager
+def openPairedReadsInputFile(inputFilePath):
+    """
+    Opens the given file path for reading bytes. Files ending in ".gz" or ".zst" are decompressed as they are read,
+    using pigz (if available, otherwise python's gzip module) or zstd, respectively.
+    """
+
+    if inputFilePath.endswith(".gz") and shutil.which("pigz") is not None: decompressionArguments = ("pigz", "-cd", inputFilePath)
+    elif inputFilePath.endswith(".zst"): decompressionArguments = ("zstd", "-q", "-dc", inputFilePath)
+    elif inputFilePath.endswith(".gz"):
+        with gzip.open(inputFilePath, 'rb') as inputFile: yield inputFile
+        return
+    else:
+        with open(inputFilePath, 'rb') as inputFile: yield inputFile
+        return
+
+    with subprocess.Popen(decompressionArguments, stdout = subprocess.PIPE, bufsize = 1024*1024) as decompressionProcess:
+        yield decompressionProcess.stdout
+    if decompressionProcess.returncode != 0:
+        raise subprocess.CalledProcessError(decompressionProcess.returncode, decompressionArguments)
+
+
+@contextmanager
+def openCombinedReadsOutputFile(outputFilePath, outputCompression = None):
+    """
+    Opens the given file path for writing bytes. If outputCompression is given, the written data is piped through
+    the corresponding compression program (pigz is used in place of gzip if it is available) instead of being written directly.
+    If an error occurs before writing is finished (e.g. the input is found to be unsorted), the partially written file is removed.
+    """
+
+    outputFileOpened = False
+    try:
+
+        if outputCompression is None:
+            with open(outputFilePath, 'wb', buffering = 1024*1024) as outputFile:
+                outputFileOpened = True
+                yield outputFile
+            return
+
+        if outputCompression == "gzip" and shutil.which("pigz") is not None: compressionArguments = ("pigz", "-c")
+        elif outputCompression == "zstd": compressionArguments = ("zstd", "-q", "-c", "-T0")
+        else: compressionArguments = (outputCompression, "-c")
+
+        with open(outputFilePath, 'wb') as outputFile:
+            outputFileOpened = True
+            with subprocess.Popen(compressionArguments, stdin = subprocess.PIPE, stdout = outputFile,
+                                  bufsize = 1024*1024) as compressionProcess:
+                yield compressionProcess.stdin
+        if compressionProcess.returncode != 0:
+            raise subprocess.CalledProcessError(compressionProcess.returncode, compressionArguments)
+
+    except BaseException:
+        if outputFileOpened and os.path.exists(outputFilePath): os.remove(outputFilePath)
+        raise
+
+
 def combinePairedBedReads(pairedBedReadsFilePaths: List[str], maxConcordantDistance = 500, combinationMethod = CombinationMethod.FIVE_PRIME_END,
-                          checkSorting = True, outputToTmpDir = False, verbose = True) -> List[str]:
+                          checkSorting = True, outputToTmpDir = False, verbose = True, outputCompression = None) -> List[str]:
     """
     Takes a list of bed files containing aligned reads and combines reads which align concordantly, as decided by the maxConcordantDistance parameter.
     Each bed file is assumed to contain information from both reads. (i.e., reads should not be split across multiple bed files.)
+    Bed files may be gzipped (".bed.gz") or zstd-compressed (".bed.zst").
+    If checkSorting is True, reads are checked as they are processed to ensure they are sorted on their ID (the 4th column)
+    in byte order (e.g., "LC_ALL=C sort -k4,4 -s"). Otherwise, an UnsortedInputError is raised, and the partial output is removed.
+    outputCompression may be "gzip", "bgzip", or "zstd" to pipe the output through that program as it is written
+    (with the matching file extension appended), or None to write uncompressed bed files.
     """
 
+    if not isinstance(combinationMethod, CombinationMethod):
+        raise ValueError("Expected instance of CombinationMethod but received " + str(combinationMethod))
+    if outputCompression is not None and outputCompression not in COMPRESSION_EXTENSIONS:
+        raise UserInputError(f"Unrecognized output compression given: {outputCompression}\n"
+                             'Expected "gzip", "bgzip", "zstd", or None')
+
     pairedCombinedBedReadsFilePaths = list()
 
     for pairedBedReadsFilePath in pairedBedReadsFilePaths:
 
         if verbose: print(f"Working in {os.path.basename(pairedBedReadsFilePath)}...")
 
-        # Ensure that reads are sorted on their ID so that pairs can be found.
-        if checkSorting:
-            try:
-                subprocess.check_output(("sort","-k4,4", "-s", "-c", pairedBedReadsFilePath))
-            except subprocess.CalledProcessError:
-                raise UnsortedInputError(pairedBedReadsFilePath, "Expected sorting based on readID.")
-            
         pairedCombinedBedReadsFilePath = pairedBedReadsFilePath.rsplit(".bed",1)[0] + "_combined_reads.bed"
         if outputToTmpDir: pairedCombinedBedReadsFilePath = os.path.join(os.path.dirname(pairedCombinedBedReadsFilePath),
                                                                          getTempDir(pairedCombinedBedReadsFilePath),
                                                                          os.path.basename(pairedCombinedBedReadsFilePath))
+        if outputCompression is not None: pairedCombinedBedReadsFilePath += COMPRESSION_EXTENSIONS[outputCompression]
         pairedCombinedBedReadsFilePaths.append(pairedCombinedBedReadsFilePath)
 
-        with open(pairedBedReadsFilePath, 'r') as pairedBedReadsFile, open(pairedCombinedBedReadsFilePath, 'w') as pairedCombinedBedReadsFile:
+        # NOTE: The files are processed as raw bytes to avoid decoding and re-encoding every line.
+        with openPairedReadsInputFile(pairedBedReadsFilePath) as pairedBedReadsFile, \
+             openCombinedReadsOutputFile(pairedCombinedBedReadsFilePath, outputCompression) as pairedCombinedBedReadsFile:
 
-            lastRead = pairedBedReadsFile.readline().split()
+            # The read IDs without their trailing mate number are stored alongside each read so they only need to be sliced once.
+            # Similarly, the original lines are kept so that reads which are not combined can be written as-is.
+            lastLine = pairedBedReadsFile.readline()
+            lastRead = lastLine.split()
+            if lastRead: lastReadPairID = lastRead[3][:-1]
 
             for line in pairedBedReadsFile:
 
+                if not line.endswith(b'\n'): line += b'\n' # (Only possible for the last line in the file.)
                 thisRead = line.split()
+                thisReadPairID = thisRead[3][:-1]
+
+                # Ensure that reads are sorted on their ID so that pairs can be found.
+                if checkSorting and thisRead[3] < lastRead[3]:
+                    raise UnsortedInputError(pairedBedReadsFilePath, EXPECTED_READ_ID_SORTING)
 
                 # Check if we have paired reads.
-                if thisRead[3][:-1] == lastRead[3][:-1]:
+                if thisReadPairID == lastReadPairID:
 
                     # Make sure the reads are given in order.
-                    assert lastRead[3][-1] == "1"
+                    assert lastRead[3].endswith(b'1')
 
                     # First, check if the paired reads aligned to the same chromosome.
                     # If they didn't, they can't be combined and need to be written separately.
                     if thisRead[0] != lastRead[0]:
 
-                        pairedCombinedBedReadsFile.write('\t'.join(lastRead) + '\n' + '\t'.join(thisRead) + '\n')
+                        pairedCombinedBedReadsFile.write(lastLine + line)
 
                     else:
 
                         # Determine how to combine the reads.
+                        lastStart = int(lastRead[1]); lastEnd = int(lastRead[2])
+                        thisStart = int(thisRead[1]); thisEnd = int(thisRead[2])
 
                         # Get the five prime end of each read and use them to determine the start and end of the region.
                         if combinationMethod == CombinationMethod.FIVE_PRIME_END:
-                            if lastRead[5] == '+':
-                                combinedStart = int(lastRead[1])
-                                combinedEnd = int(thisRead[2])
+                            if lastRead[5] == b'+':
+                                combinedStart = lastStart
+                                combinedEnd = thisEnd
                             else:
-                                combinedStart = int(thisRead[1])
-                                combinedEnd = int(lastRead[2])
+                                combinedStart = thisStart
+                                combinedEnd = lastEnd
 
                         # Get the three prime end of reach read and use them to determine the start and end of the region.
                         # (Not sure if this will ever be useful, tbh...)
                         elif combinationMethod == CombinationMethod.THREE_PRIME_END:
-                            if lastRead[5] == '+':
-                                combinedStart = int(thisRead[1])
-                                combinedEnd = int(lastRead[2])
+                            if lastRead[5] == b'+':
+                                combinedStart = thisStart
+                                combinedEnd = lastEnd
                             else:
-                                combinedStart = int(lastRead[1])
-                                combinedEnd = int(thisRead[2])
+                                combinedStart = lastStart
+                                combinedEnd = thisEnd
 
                         # Determine the longest possible region contained by the two reads.
                         # Notably, determining the combined region this way is permissive of alignments which overlap, contain one another, or dovetail.
-                        elif combinationMethod == CombinationMethod.LONGEST_READ:
-                            if int(thisRead[1]) < int(lastRead[1]): combinedStart = int(thisRead[1])
-                            else: combinedStart = int(lastRead[1])
-                            if int(thisRead[2]) > int(lastRead[2]): combinedEnd = int(thisRead[2])
-                            else: combinedEnd = int(lastRead[2])
                         else:
-                            raise ValueError("Expected instance of CombinationMethod but received " + combinationMethod)
+                            combinedStart = min(thisStart, lastStart)
+                            combinedEnd = max(thisEnd, lastEnd)
 
                         # If the combined region is a valid bed region that meets the maxConcordantDistance threshold,
                         # write the combined region. Otherwise, write each read separately.
                         if combinedEnd-combinedStart <= maxConcordantDistance and combinedEnd > combinedStart:
-                            pairedCombinedBedReadsFile.write('\t'.join((lastRead[0],str(combinedStart),str(combinedEnd), lastRead[3][:-1]+'*',
-                                                                        lastRead[4], lastRead[5])) + '\n')
+                            pairedCombinedBedReadsFile.write(b'\t'.join((lastRead[0], b'%d' % combinedStart, b'%d' % combinedEnd, lastReadPairID+b'*',
+                                                                        lastRead[4], lastRead[5])) + b'\n')
                         else:
-                            pairedCombinedBedReadsFile.write('\t'.join(lastRead) + '\n' + '\t'.join(thisRead) + '\n')
+                            pairedCombinedBedReadsFile.write(lastLine + line)
 
                     # Regardless of how the pair was handled, both reads were consumed, so a new "lastRead" needs to be read in.
-                    lastRead = pairedBedReadsFile.readline().split()
+                    lastLine = pairedBedReadsFile.readline()
+                    lastRead = lastLine.split()
+                    if lastRead:
+                        lastReadPairID = lastRead[3][:-1]
+                        if checkSorting and lastRead[3] < thisRead[3]:
+                            raise UnsortedInputError(pairedBedReadsFilePath, EXPECTED_READ_ID_SORTING)
 
                 # Unpaired reads are simply written as they are.
                 else:
 
-                    pairedCombinedBedReadsFile.write('\t'.join(lastRead) + '\n')
+                    pairedCombinedBedReadsFile.write(lastLine)
+                    lastLine = line
                     lastRead = thisRead
+                    lastReadPairID = thisReadPairID
 
             # Make sure to include the last read! (If it wasn't already consumed as part of a pair)
-            if lastRead: pairedCombinedBedReadsFile.write('\t'.join(lastRead) + '\n')
+            if lastRead: pairedCombinedBedReadsFile.write(lastLine if lastLine.endswith(b'\n') else lastLine + b'\n')
 
     return pairedCombinedBedReadsFilePaths
 
@@ -119,7 +207,8 @@ def combinePairedBedReads(pairedBedReadsFilePaths: List[str], maxConcordantDista
 def main():
 
     with TkinterDialog(workingDirectory = os.getenv("HOME"), title = "Combine Paired Bed Reads") as dialog:
-        dialog.createMultipleFileSelector("Aligned Reads:", 0, ".bed", ("bed Files", ".bed"))
+        dialog.createMultipleFileSelector("Aligned Reads:", 0, ".bed", ("bed Files", ".bed"), ("Gzipped bed Files", ".bed.gz"),
+                                          additionalFileEndings = [".bed.gz"])
         dialog.createTextField("Max Concordant Distance:", 1, 0, defaultText = "500")
         dialog.createDropdown("Combination Method", 2, 0, [combinationMethod.name.lower().replace('_', ' ') for combinationMethod in CombinationMethod])
         dialog.createCheckbox("Check sorting", 3, 0)
@@ -1,13 +1,25 @@
 # This script takes a set of potential adapter sequences and a fastq file and
 # determines which adapters are enriched in the reads.
-import os, gzip
-from typing import List, Dict, TextIO
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Set, Tuple, Callable, TextIO
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
 from benbiohelpers.FileSystemHandling.DirectoryHandling import checkDirs, getIsolatedParentDir
 from benbiohelpers.FileSystemHandling.FastaFileIterator import FastaFileIterator
-from benbiohelpers.FileSystemHandling.GetFileSubset import getFastqSubset
+from benbiohelpers.FileSystemHandling.GetFileSubset import getFastqSubset, openGzippedFileForReading
 from benbiohelpers.InputParsing.CheckForNumber import checkForNumber
 
+# ahocorasick_rs and pyahocorasick are optional, but allow all adapters to be searched for in a single pass over each read.
+# (ahocorasick_rs is preferred if both are installed.)
+try:
+    import ahocorasick_rs
+except ImportError:
+    ahocorasick_rs = None
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 
 class NoEnrichedAdapterError(Exception):
     """
@@ -15,17 +27,60 @@ class NoEnrichedAdapterError(Exception):
     """
 
 
-def getFastqEntrySequence(fastqFile: TextIO):
+def getFastqSequences(fastqFile: TextIO):
+    """
+    Reads the remainder of the fastq file all at once and returns a list of the raw sequences (every second line of four).
+    Intended for reasonably small files, like the subsets used to search for adapters.
+    """
+    return [sequence.strip() for sequence in fastqFile.read().split('\n')[1::4]]
+
+def getSearchSequenceFinder(searchSequences: List[str]) -> Callable[[str], Set[str]]:
     """
-    Reads the next four lines in the fastq file and returns the raw sequence (second line).
+    Returns a function which takes a read sequence and returns the set of the given search sequences that it contains.
+    If ahocorasick_rs or pyahocorasick is installed, all search sequences are found in a single pass over the read.
     """
-    fastqFile.readline()
-    sequence = fastqFile.readline().strip()
-    fastqFile.readline(); fastqFile.readline()
-    return sequence
+    if ahocorasick_rs is not None:
+        searcher = ahocorasick_rs.AhoCorasick(searchSequences)
+        return lambda sequence: set(searcher.find_matches_as_strings(sequence, overlapping = True))
+    elif ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for searchSequence in searchSequences: automaton.add_word(searchSequence, searchSequence)
+        automaton.make_automaton()
+        return lambda sequence: {match for _, match in automaton.iter(sequence)}
+    else:
+        return lambda sequence: {searchSequence for searchSequence in searchSequences if searchSequence in sequence}
+
+
+def countSearchSequences(fastqFilePath: str, searchSequences: List[str], tempDir: str):
+    """
+    Subsets the given fastq file (writing the subset to tempDir) and counts the reads in the subset that contain
+    each of the given search sequences.
+    Returns the total number of reads in the subset and a dictionary of counts for each search sequence.
+    """
+
+    # Determine what function will be used to handle file IO
+    if fastqFilePath.endswith(".gz"): openFunction = openGzippedFileForReading
+    else: openFunction = lambda filePath: open(filePath, "rt")
+
+    # Do some initialization
+    findSearchSequences = getSearchSequenceFinder(searchSequences)
+    totalSequences = 0
+    searchSequenceCounts = dict.fromkeys(searchSequences, 0)
+
+    # Subset the fastq file and open the resulting file path.
+    with openFunction(getFastqSubset(fastqFilePath, outputDir=tempDir)) as fastqSubsetFile:
+
+        # Loop through the fastq sequences, looking for the relevant adapter sequences.
+        for sequence in getFastqSequences(fastqSubsetFile):
+            # Each search sequence is only counted once per read, no matter how many times it is found.
+            for searchSequence in findSearchSequences(sequence): searchSequenceCounts[searchSequence] += 1
+            totalSequences += 1
+
+    return totalSequences, searchSequenceCounts
+
 
 def findAdapters(fastqFilePaths: List[str], adapterFilePath, threshold = 0.01, defaultToMax = True, aggregateOutput = False,
-                 searchLengthLimit = None):
+                 searchLengthLimit = None, fileParallelism = 1):
     """
     Given one or more fastq files (in a list) and a fasta file of adapter sequences,
     determines which adapters are enriched in each file (using a subset of that file)
@@ -36,6 +91,7 @@ def findAdapters(fastqFilePaths: List[str], adapterFilePath, threshold = 0.01, d
     determined by the the first fastq file path given. (Useful when preparing to trim paired-end data.)
     - searchLengthLimit determines the maximum number of bases in each adapter sequence that are used for exact matching,
     starting from the 5' end.
+    - If fileParallelism is greater than 1, up to that many fastq files are subset and searched at once in separate processes.
     """
 
     # Get the fasta entries from the adapter file.
@@ -44,45 +100,43 @@ def findAdapters(fastqFilePaths: List[str], adapterFilePath, threshold = 0.01, d
         for fastaEntry in FastaFileIterator(adapterFile, False):
             adapterFastaEntries.append(fastaEntry)
 
-    adapterSearchSequences: Dict[FastaFileIterator.FastaEntry:str] = dict()
-    for adapterFastaEntry in adapterFastaEntries:
-        if searchLengthLimit is None: adapterSearchSequences[adapterFastaEntry] = adapterFastaEntry.sequence
-        else: adapterSearchSequences[adapterFastaEntry] = adapterFastaEntry.sequence[:searchLengthLimit]
+    # Get the sequence used to search for each adapter (in the same order as the fasta entries).
+    adapterSearchSequences: Tuple[str, ...] = tuple(adapterFastaEntry.sequence[:searchLengthLimit]
+                                                    for adapterFastaEntry in adapterFastaEntries)
+
+    # Multiple adapters may share the same search sequence, so reads are only checked for each distinct search sequence.
+    distinctSearchSequences = list(dict.fromkeys(adapterSearchSequences))
 
+    # Generate a temporary directory for each fastq file's subset.
+    tempDirs = [os.path.join(os.path.dirname(fastqFilePath),".tmp") for fastqFilePath in fastqFilePaths]
+    checkDirs(*tempDirs)
+
+    # If requested, count the search sequences in all the fastq files up front, across multiple processes.
+    # (Otherwise, each file is counted in turn below.)
+    countingArguments = [(fastqFilePath, distinctSearchSequences, tempDir) for fastqFilePath, tempDir in zip(fastqFilePaths, tempDirs)]
+    countingResults = None
+    if fileParallelism > 1 and len(fastqFilePaths) > 1:
+        with ProcessPoolExecutor(max_workers = fileParallelism) as executor:
+            countingFutures = [executor.submit(countSearchSequences, *arguments) for arguments in countingArguments]
+            countingResults = [countingFuture.result() for countingFuture in countingFutures]
 
     # Loop through the given fastq files, looking for adapter enrichment in each.
     enrichedAdapters = list()
     enrichedAdapterFilePath = None
     enrichedAdapterWriteMode = None
     enrichedAdapterFilePaths = list()
-    for fastqFilePath in fastqFilePaths:
+    for i, fastqFilePath in enumerate(fastqFilePaths):
 
         print(f"\nSearching for enriched adapters in {os.path.basename(fastqFilePath)}...")
 
         if not aggregateOutput: enrichedAdapters = list()
 
-        # Determine what function will be used to handle file IO
-        if fastqFilePath.endswith(".gz"): openFunction = gzip.open
-        else: openFunction = open
-
-        # Generate a temporary directory.
-        tempDir = os.path.join(os.path.dirname(fastqFilePath),".tmp")
-        checkDirs(tempDir)
-
-        # Do some initialization
-        totalSequences = 0
-        adapterCounts = {fastaEntry:0 for fastaEntry in adapterFastaEntries}
+        if countingResults is None: totalSequences, searchSequenceCounts = countSearchSequences(*countingArguments[i])
+        else: totalSequences, searchSequenceCounts = countingResults[i]
 
-        # Subset the fastq file and open the resulting file path.
-        with openFunction(getFastqSubset(fastqFilePath, outputDir=tempDir), "rt") as fastqSubsetFile:
-
-            # Loop through the fastq sequences, looking for the relevant adapter sequences.
-            sequence = getFastqEntrySequence(fastqSubsetFile)
-            while sequence:
-                for fastaEntry in adapterCounts:
-                    if adapterSearchSequences[fastaEntry] in sequence: adapterCounts[fastaEntry] += 1
-                totalSequences += 1
-                sequence = getFastqEntrySequence(fastqSubsetFile)
+        # Assign each adapter the count for its search sequence.
+        adapterCounts = {fastaEntry:searchSequenceCounts[adapterSearchSequence]
+                         for fastaEntry, adapterSearchSequence in zip(adapterFastaEntries, adapterSearchSequences)}
 
         # Determine the threshold for adapter enrichment.
         enrichmentThreshold = totalSequences * threshold
@@ -113,7 +167,7 @@ def findAdapters(fastqFilePaths: List[str], adapterFilePath, threshold = 0.01, d
                 if defaultToMax:
                     print("WARNING: No adapters meet enrichment threshold. "
                         "Adapter with maximum enrichment will be written.")
-                    if fastaEntry.sequence not in enrichedAdapters:
+                    if maxAdapter.sequence not in enrichedAdapters:
                         enrichedAdapterFile.write(maxAdapter.formatForWriting())
                         enrichedAdapters.append(maxAdapter.sequence)
                 else:
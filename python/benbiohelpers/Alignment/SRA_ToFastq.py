@@ -3,44 +3,68 @@
 # and uses sra-tools to download and convert the reads to fastq.gz format.
 
 import os, subprocess, time, shutil
+from concurrent.futures import ThreadPoolExecutor
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
 from benbiohelpers.FileSystemHandling.DirectoryHandling import checkDirs
 from benbiohelpers.InputParsing.CheckForNumber import checkForNumber
 
+# The number of threads fasterq-dump uses when none are specified. It is never given fewer than this.
+FASTERQ_DUMP_DEFAULT_THREADS = 6
+
+
+# Runs prefetch for the given run accession ID and returns the time it took (in seconds).
+def prefetch(runAccessionID, alignmentFilesDir):
+    prefetchStartTime = time.time()
+    subprocess.check_call(("prefetch", "-p", "-O", alignmentFilesDir, runAccessionID))
+    return time.time() - prefetchStartTime
+
+
 # Given a file path to a list of run accession IDs and an optional file path to their corresponding names,
 # uses sra-tools to retrieve the fastq sequences.
+# The given number of threads is used by fasterq-dump (if it exceeds fasterq-dump's default) and while gzipping.
 def sRA_ToFastq(runAccessionIDsFilePath, getNamesFromCol2 = False, threads = 1):
     
     startTime = time.time()
     gzippedFastqFiles = list()
+
+    # Retrieve the accession IDs and names from the given file, and generate the paths for output.
+    runAccessions = list()
     with open(runAccessionIDsFilePath, 'r') as runAccessionIDsFile:
         for line in runAccessionIDsFile:
 
-            # Retrieve the accession ID and name from the current line.
             if getNamesFromCol2:
                 runAccessionID, name = line.strip().split('\t')
             else:
                 runAccessionID = line.strip().split('\t')[0]
                 name = runAccessionID
 
-            print(f"\nRetrieving reads for {runAccessionID}")
-            
-
-            # Generate the paths for output.
             alignmentFilesDir = os.path.join(os.path.dirname(runAccessionIDsFilePath), name, "alignment_files")
             checkDirs(alignmentFilesDir)
+            runAccessions.append((runAccessionID, name, alignmentFilesDir))
+
+    # Prefetching is mostly network-bound, so each accession is prefetched in the background while the previous one
+    # is converted to fastq and gzipped. (Only one accession is prefetched ahead to limit the disk space used.)
+    with ThreadPoolExecutor(max_workers = 1) as prefetchExecutor:
+
+        if runAccessions: nextPrefetch = prefetchExecutor.submit(prefetch, runAccessions[0][0], runAccessions[0][2])
+
+        for i, (runAccessionID, name, alignmentFilesDir) in enumerate(runAccessions):
+
+            print(f"\nRetrieving reads for {runAccessionID}")
             fastqOutputFilePath = os.path.join(alignmentFilesDir, name + ".fastq")
 
-            # Run prefetch.
-            prefetchStartTime = time.time()
+            # Wait for prefetch to finish, and then start prefetching the next accession.
             print("\nRunning prefetch...")
-            subprocess.check_call(("prefetch", "-p", "-O", alignmentFilesDir, runAccessionID))
-            print(f"Time to fetch: {time.time() - prefetchStartTime} seconds")
+            prefetchTime = nextPrefetch.result()
+            print(f"Time to fetch: {prefetchTime} seconds")
+            if i + 1 < len(runAccessions):
+                nextPrefetch = prefetchExecutor.submit(prefetch, runAccessions[i+1][0], runAccessions[i+1][2])
 
             # Run fasterqdump.
             fasterqDumpStartTime = time.time()
             print("\nRunning fasterq-dump...")
-            subprocess.check_call(("fasterq-dump", "-p", "-o", fastqOutputFilePath, runAccessionID), cwd = alignmentFilesDir)
+            subprocess.check_call(("fasterq-dump", "-p", "-e", str(max(threads, FASTERQ_DUMP_DEFAULT_THREADS)),
+                                   "-o", fastqOutputFilePath, runAccessionID), cwd = alignmentFilesDir)
             print(f"Time to retrieve fastq: {time.time() - fasterqDumpStartTime} seconds")
 
             # gzip the results.
@@ -68,7 +92,7 @@ def main():
     with TkinterDialog(workingDirectory = os.getenv("HOME"), title = "SRA to Fastq") as dialog:
         dialog.createFileSelector("SRA run accession IDs:", 0, ("text file",".txt"), ("Tab separated values file", ".tsv"))
         dialog.createCheckbox("Get names from second column in file (tab-separated)", 1, 0)
-        dialog.createTextField("Threads to use while gzipping:", 2, 0, defaultText = 1)
+        dialog.createTextField("Threads to use:", 2, 0, defaultText = 1)
 
     threads = checkForNumber(dialog.selections.getTextEntries()[0], True, lambda x:x>0, "Expected a positive-integer number of threads")
     sRA_ToFastq(dialog.selections.getIndividualFilePaths()[0], dialog.selections.getToggleStates()[0], threads)
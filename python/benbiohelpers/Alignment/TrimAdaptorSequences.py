@@ -1,56 +1,26 @@
 import os, subprocess
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
-from benbiohelpers.Alignment.AlignReads import removeTrimmedAndTmp
-from benbiohelpers.CustomErrors import InvalidPathError
+from benbiohelpers.Alignment.AlignReads import removeTrimmedAndTmp, findPairedReadsFiles
 from benbiohelpers.InputParsing.CheckForNumber import checkForNumber
 
 
 # For each of the given reads files, run the accompanying bash script to perform the alignment.
 def trimAdaptorSequences(rawReadsFilePaths: List[str], adapterSequencesFilePath, pairedEndInput = False,
-                         threads = 1, legacyTrimming = False):
+                         threads = 1, legacyTrimming = False, fileParallelism = 1):
 
     trimmingBashScriptFilePath = os.path.join(os.path.dirname(__file__),"TrimAdaptorSequences.bash")
 
      # If performing paired end alignment, find pairs for all the given raw reads files.
     if pairedEndInput:
-        read1FilePaths: List[str] = list(); read2FilePaths: List[str] = list()
-        for rawReadsFilePath in rawReadsFilePaths:
-
-            # It's possible we have already assigned this file path as a pair of a previous path. Double check!
-            if rawReadsFilePath in read1FilePaths or rawReadsFilePath in read2FilePaths: continue
-
-            # Find the pair and assign each pair to their respective list.
-            baseName = rawReadsFilePath.rsplit(".fastq",1)[0]
-            if baseName.endswith("_1") or baseName.endswith("_R1"):
-                read1FilePaths.append(rawReadsFilePath)
-                pairedBaseName = baseName[:-1] + '2'
-                pairedList = read2FilePaths
-            elif baseName.endswith("_2") or baseName.endswith("_R2"):
-                read2FilePaths.append(rawReadsFilePath)
-                pairedBaseName = baseName[:-1] + '1'
-                pairedList = read1FilePaths
-            else: raise InvalidPathError(rawReadsFilePath, "Given path does not end with \"_1\", \"_R1\", \"_2\" or \"_R2\" "
-                                                           "(prior to file extension; e.g. my_reads_2.fastq.gz is valid.)")
-
-            pairFound = False
-            for fileExtension in (".fastq", ".fastq.gz"):
-                pairedFilePath = pairedBaseName + fileExtension
-                if os.path.exists(pairedFilePath): 
-                    pairedList.append(pairedFilePath)
-                    print(f"Found fastq file pair with basename: {os.path.basename(pairedBaseName).rsplit('_',1)[0]}")
-                    pairFound = True
-                    break
-
-            if not pairFound: raise InvalidPathError(rawReadsFilePath, "No matching pair found. Expected paired files (in same "
-                                                                       "directory) ending in \"1\" and \"2\", but only found:")
-
+        read1FilePaths, read2FilePaths = findPairedReadsFiles(rawReadsFilePaths)
         rawReadsFilePaths = read1FilePaths
 
 
+    # Get the arguments for running the trimming script on each (pair of) file(s).
+    trimmingArguments = list()
     for i, rawReadsFilePath in enumerate(rawReadsFilePaths):
-        
-        # Run the trimming script.
         if pairedEndInput:
             arguments = ["bash", trimmingBashScriptFilePath, "-1", read1FilePaths[i], "-2", read2FilePaths[i]]
         else:
@@ -58,7 +28,18 @@ def trimAdaptorSequences(rawReadsFilePaths: List[str], adapterSequencesFilePath,
         arguments += ["-t", str(threads)]
         arguments += ["-a", adapterSequencesFilePath]
         if legacyTrimming: arguments += ["--legacy-trimming"]
-        subprocess.run(arguments, check = True)
+        trimmingArguments.append(arguments)
+
+    # Run the trimming script on one file at a time, or on multiple files at once if requested.
+    # (The work is done in the trimming script's subprocesses, so threads are sufficient to run them concurrently.)
+    # NOTE: Each run still uses the given number of threads, so fileParallelism*threads should not exceed
+    #       the number of available cores.
+    if fileParallelism > 1 and len(trimmingArguments) > 1:
+        with ThreadPoolExecutor(max_workers = fileParallelism) as executor:
+            trimmingFutures = [executor.submit(subprocess.run, arguments, check = True) for arguments in trimmingArguments]
+            for trimmingFuture in trimmingFutures: trimmingFuture.result()
+    else:
+        for arguments in trimmingArguments: subprocess.run(arguments, check = True)
 
 
 def main():
@@ -69,7 +50,8 @@ def main():
         dialog.createCheckbox("Find paired files", 1, 0)
         dialog.createFileSelector("Adapter Sequences:", 2, ("Fasta Files", ".fa"))
         dialog.createTextField("How many Threads should be used?", 3, 0, defaultText="1")
-        dialog.createCheckbox("Use legacy trimming (trimmomatic)", 4, 0)
+        dialog.createTextField("How many files should be trimmed at once?", 4, 0, defaultText="1")
+        dialog.createCheckbox("Use legacy trimming (trimmomatic)", 5, 0)
 
     # Get the raw reads files, but make sure that no trimmed reads files have tagged along!
     unfilteredRawReadsFilePaths = dialog.selections.getFilePathGroups()[0]
@@ -81,10 +63,12 @@ def main():
     legacyTrimming = dialog.selections.getToggleStates()[1]
 
     threads = checkForNumber(dialog.selections.getTextEntries()[0], True, lambda x:x>0, "Expected a positive-integer number of threads")
+    fileParallelism = checkForNumber(dialog.selections.getTextEntries()[1], True, lambda x:x>0,
+                                     "Expected a positive-integer number of files to trim at once")
 
 
     trimAdaptorSequences(filteredRawReadsFilePaths, adapterFilePath,
-                         pairedEndInput, threads, legacyTrimming)
+                         pairedEndInput, threads, legacyTrimming, fileParallelism)
 
 
 if __name__ == "__main__": main()
\ No newline at end of file
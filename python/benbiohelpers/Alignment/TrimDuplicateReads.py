@@ -13,31 +13,20 @@ def trimDuplicateReads(readsFilePaths: List[str]):
         noDupsFilePath = readsFilePath.rsplit('.',1)[0] + "_no_dups.bed"
 
         # Sort the file first, just to be sure!
+        # NOTE: The start and end positions are sorted as separate keys so that reads with the same location are always
+        #       adjacent, no matter how the locale breaks ties between whole lines. (Some locales ignore whitespace when comparing lines.)
+        #       This is also the sorting expected by other tools in this package (e.g. ThisInThatCounter).
         print("Sorting...")
-        subprocess.run( ("sort", "-k1,1", "-k2,3n", "-o", readsFilePath, readsFilePath), check = True)
+        subprocess.run( ("sort", "-k1,1", "-k2,2n", "-k3,3n", "-o", readsFilePath, readsFilePath), check = True)
 
-        encounteredReads = dict()
-
-        # Iterate through the sorted reads file, writing each line to the new file but omitting any duplicate reads beyond the first.
+        # Write each line of the sorted reads file to the new file, omitting any duplicate reads beyond the first.
+        # Since duplicates are adjacent, awk only needs to compare each read's location (first three columns)
+        # to the previous one. (Blank lines are skipped.)
         print("Removing excess duplicates...")
-        with open(readsFilePath, 'r') as readsFile:
-            with open(noDupsFilePath, 'w') as noDupsFile:
-
-                lastReadLocation = ''
-
-                for line in readsFile:
-
-                    readLocation = ' '.join(line.split()[:3])
-
-                    # Write this read only if it does not match the previous read.
-                    if readLocation != lastReadLocation:
-
-                        noDupsFile.write(line)
-
-                        assert readLocation not in encounteredReads, "Read has been encountered before: " + readLocation
-                        encounteredReads[readLocation] = None
-
-                        lastReadLocation = readLocation
+        with open(noDupsFilePath, 'w') as noDupsFile:
+            subprocess.run(("awk", 'NF > 0 {readLocation = $1 " " $2 " " $3} '
+                                   'NF > 0 && readLocation != lastReadLocation {print; lastReadLocation = readLocation}',
+                            readsFilePath), stdout = noDupsFile, check = True)
 
 
 def main():
@@ -1,8 +1,11 @@
 # This script contains an abstract class for counting one thing (e.g. mutations) within another thing (e.g. nucleosomes)
 # It contains a lot of modular components for, say, categorizing counts based on the strand relative to encompassing feature.
 # I'm hoping this will save me a lot of time in the future!
+# NOTE: The counting loop (and the input data structures it uses) is pure Python with no compiled dependencies, so it can be run
+# as-is under PyPy (e.g. "pypy3 -m pip install benbiohelpers", then "pypy3 myCountingScript.py"), which can speed it up considerably.
+# Please keep it that way: any numpy/numba acceleration should be optional and imported within a try/except block.
 from abc import ABC, abstractmethod
-import warnings, subprocess
+import warnings, subprocess, bisect
 from typing import List
 from benbiohelpers.CountThisInThat.InputDataStructures import EncompassedData, EncompassingData, ENCOMPASSED_DATA, ENCOMPASSING_DATA
 from benbiohelpers.CountThisInThat.CounterOutputDataHandler import CounterOutputDataHandler
@@ -58,7 +61,12 @@ class ThisInThatCounter(ABC):
 
         # Set up data structures for the output data and tracking the state of encompassed features.
         self.setUpOutputDataHandler()
+        # Confirmed encompassed features are kept sorted by position (alongside a parallel list of those positions)
+        # so that features exiting encompassment can be found with a binary search instead of a full scan.
         self.confirmedEncompassedFeatures: List[EncompassedData] = list()
+        self.confirmedEncompassedPositions: List[float] = list()
+        # (Unless the output data handler says it doesn't need them revisited, in which case they aren't tracked at all.)
+        self.tracksReEntry = self.outputDataHandler.needsReEntryTracking()
 
         # This is normally called within readNextEncompassingFeature, but for the first pass, the output data handler doesn't exist.
         # So... Call it now instead!
@@ -74,23 +82,32 @@ class ThisInThatCounter(ABC):
         """
         if not self.suppressOutput: print("Checking input files for proper sorting...")
 
+        # Start the checks for both files at once, since they are independent of one another.
+        # (sort -c writes nothing to stdout, so there's no need to capture it.)
+        sortCheckProcesses = list()
         if checkForSortedFiles[0]:
             if not self.suppressOutput: print("Checking encompassed features file for proper sorting...")
-            try:
-                subprocess.check_output(("sort","-k1,1","-k2,2n", "-k3,3n", "-s", "-c", encompassedFeaturesFilePath))
-            except subprocess.CalledProcessError:
-                raise UnsortedInputError(encompassedFeaturesFilePath,
-                                         "Expected sorting based on chromosome name, alphabetically, "
-                                         "followed by start and end position.")
-            
+            sortCheckProcesses.append((encompassedFeaturesFilePath, subprocess.Popen(
+                ("sort","-k1,1","-k2,2n", "-k3,3n", "-s", "-c", encompassedFeaturesFilePath), stdout = subprocess.DEVNULL
+            )))
         if checkForSortedFiles[1]:
             if not self.suppressOutput: print("Checking encompassing features file for proper sorting...")
-            try:
-                subprocess.check_output(("sort","-k1,1","-k2,2n", "-k3,3n", "-s", "-c", encompassingFeaturesFilePath))
-            except subprocess.CalledProcessError:
-                raise UnsortedInputError(encompassingFeaturesFilePath,
-                                         "Expected sorting based on chromosome name, alphabetically, "
-                                         "followed by start and end position.")
+            sortCheckProcesses.append((encompassingFeaturesFilePath, subprocess.Popen(
+                ("sort","-k1,1","-k2,2n", "-k3,3n", "-s", "-c", encompassingFeaturesFilePath), stdout = subprocess.DEVNULL
+            )))
+
+        # Wait for the checks to finish, making sure no check is left running if an unsorted file is found.
+        try:
+            for filePath, sortCheckProcess in sortCheckProcesses:
+                if sortCheckProcess.wait() != 0:
+                    raise UnsortedInputError(filePath,
+                                             "Expected sorting based on chromosome name, alphabetically, "
+                                             "followed by start and end position.")
+        finally:
+            for _, sortCheckProcess in sortCheckProcesses:
+                if sortCheckProcess.poll() is None:
+                    sortCheckProcess.kill()
+                    sortCheckProcess.wait()
 
 
     def readNextEncompassedFeature(self):
@@ -261,6 +278,16 @@ class ThisInThatCounter(ABC):
         else: return False
 
 
+    def trackConfirmedEncompassedFeature(self, encompassedFeature: EncompassedData):
+        """
+        Adds the given encompassed feature to the list of confirmed encompassed features, keeping that list sorted by position.
+        (For sorted input, this is almost always an append.)
+        """
+        insertionIndex = bisect.bisect_right(self.confirmedEncompassedPositions, encompassedFeature.position)
+        self.confirmedEncompassedPositions.insert(insertionIndex, encompassedFeature.position)
+        self.confirmedEncompassedFeatures.insert(insertionIndex, encompassedFeature)
+
+
     def checkConfirmedEncompassedFeatures(self):    
         """
         For all encompassed features that are confirmed to be within the previous encompassing feature, figure out how to handle them
@@ -268,14 +295,21 @@ class ThisInThatCounter(ABC):
         """
 
         # Flag any encompassed features that fall before the start position of the new encompassing feature to be recorded in their current state.
+        # Because confirmed features are sorted by position, these features always form a prefix of the list.
+        # If this is the final validity check (no remaining encompassing features) or the chromosome has changed,
+        # all waiting features are exiting encompassment.
+        # NOTE: All confirmed features share the chromosome of the encompassing feature(s) they were confirmed in.
+        if (self.currentEncompassingFeature is None or not self.confirmedEncompassedFeatures or
+            self.confirmedEncompassedFeatures[0].chromosome != self.currentEncompassingFeature.chromosome):
+            exitingFeatureCount = len(self.confirmedEncompassedFeatures)
+        else:
+            exitingFeatureCount = bisect.bisect_left(self.confirmedEncompassedPositions, 
+                                                     self.currentEncompassingFeature.startPos - self.encompassingFeatureExtraRadius)
 
-        # If this is the final validity check (no remaining encompassing features), all waiting features are exiting encompassment.
-        if self.currentEncompassingFeature is None:
-            for feature in self.confirmedEncompassedFeatures:
-                self.outputDataHandler.onEncompassedFeatureInEncompassingFeature(feature, self.previousEncompassingFeature, True)
-            self.confirmedEncompassedFeatures.clear()
-        # Otherwise, check them against the range of the newest encompassing feature.
-        else: self.confirmedEncompassedFeatures = [feature for feature in self.confirmedEncompassedFeatures if not self.isExitingEncompassment(feature)]
+        for feature in self.confirmedEncompassedFeatures[:exitingFeatureCount]:
+            self.outputDataHandler.onEncompassedFeatureInEncompassingFeature(feature, self.previousEncompassingFeature, True)
+        del self.confirmedEncompassedFeatures[:exitingFeatureCount]
+        del self.confirmedEncompassedPositions[:exitingFeatureCount]
 
         # Tell the output data handler to write the current set of features if incremental writing is requested.
         # NOTE: It's important that this happens before reprocessing of remaining encompassed features with the current encompassing feature, as this can
@@ -283,9 +317,87 @@ class ThisInThatCounter(ABC):
         if self.writeIncrementally != 0: self.outputDataHandler.writeWaitingFeatures()
 
         # Next, reprocess all remaining features, provided they are not ahead of the encompassing feature's range.
-        for feature in self.confirmedEncompassedFeatures:
-            if self.isEncompassedFeatureWithinEncompassingFeature(feature):
-                self.outputDataHandler.onEncompassedFeatureInEncompassingFeature(feature, self.currentEncompassingFeature, False)
+        # (Again, thanks to sorting, these features form a prefix of the remaining list.)
+        if self.currentEncompassingFeature is None: return
+        withinFeatureCount = bisect.bisect_right(self.confirmedEncompassedPositions,
+                                                 self.currentEncompassingFeature.endPos + self.encompassingFeatureExtraRadius)
+        for feature in self.confirmedEncompassedFeatures[:withinFeatureCount]:
+            self.outputDataHandler.onEncompassedFeatureInEncompassingFeature(feature, self.currentEncompassingFeature, False)
+
+
+    # The functions whose logic is reimplemented within countSimple.
+    simpleCountReplacedFunctions = ("readNextEncompassedFeature", "readNextEncompassingFeature",
+                                    "isEncompassedFeaturePastEncompassingFeature", "isEncompassedFeatureWithinEncompassingFeature",
+                                    "isExitingEncompassment", "trackConfirmedEncompassedFeature", "checkConfirmedEncompassedFeatures")
+
+    def isSimpleCount(self):
+        """
+        Determines whether the counter is set up in the simplest possible way: The default output data handler with no output data stratifiers,
+        no tracking of non-counted features, no incremental writing, and none of the functions that countSimple reimplements overridden.
+        In this case, the output is just the total number of times that an encompassed feature is found within an encompassing feature,
+        and the specialized countSimple function can be used instead.
+        """
+        # NOTE: countSimple reads and compares features on its own, so it can't be used if any of the functions it replaces are overridden.
+        return (type(self.outputDataHandler) is CounterOutputDataHandler and len(self.outputDataHandler.outputDataStratifiers) == 0 and
+                not self.outputDataHandler.trackAllEncompassed and not self.outputDataHandler.trackAllEncompassing and
+                self.writeIncrementally == 0 and
+                all(getattr(type(self), functionName) is getattr(ThisInThatCounter, functionName)
+                    for functionName in self.simpleCountReplacedFunctions))
+
+
+    def countSimple(self):
+        """
+        A specialized version of the core counting loop for when isSimpleCount returns true.  Encompassment is tallied directly
+        (rather than passing each encompassed feature through the output data handler), and only the positions of confirmed encompassed
+        features are tracked, since nothing else about them is needed to count them in overlapping encompassing features.
+        """
+
+        encompassmentCount = 0
+        confirmedPositions: List[float] = list()
+        trackedChromosome = None
+
+        while self.currentEncompassingFeature is not None:
+
+            encompassingFeature = self.currentEncompassingFeature
+            lowerBound = encompassingFeature.startPos - self.encompassingFeatureExtraRadius
+            upperBound = encompassingFeature.endPos + self.encompassingFeatureExtraRadius
+
+            # Stop tracking any confirmed encompassed features that can no longer be encompassed, 
+            # and count the ones that are within this encompassing feature.
+            if trackedChromosome != encompassingFeature.chromosome:
+                confirmedPositions.clear()
+                trackedChromosome = encompassingFeature.chromosome
+            del confirmedPositions[:bisect.bisect_left(confirmedPositions, lowerBound)]
+            encompassmentCount += bisect.bisect_right(confirmedPositions, upperBound)
+
+            # Read encompassed features until one is past the range of the encompassing feature, counting (and tracking) those within it.
+            encompassedFeature = self.currentEncompassedFeature
+            while (encompassedFeature is not None and encompassedFeature.position <= upperBound and 
+                   encompassedFeature.chromosome == trackedChromosome):
+                if encompassedFeature.position >= lowerBound:
+                    encompassmentCount += 1
+                    bisect.insort_right(confirmedPositions, encompassedFeature.position)
+                nextLine = self.encompassedFeaturesFile.readline()
+                if nextLine: encompassedFeature = self.constructEncompassedFeature(nextLine)
+                else: encompassedFeature = None
+            self.currentEncompassedFeature = encompassedFeature
+
+            # Read in the next encompassing feature and make sure the chromosomes still match.
+            nextLine = self.encompassingFeaturesFile.readline()
+            if not nextLine: self.currentEncompassingFeature = None
+            else:
+                self.previousEncompassingFeature = encompassingFeature
+                self.currentEncompassingFeature = self.constructEncompassingFeature(nextLine)
+                if self.currentEncompassingFeature.chromosome != trackedChromosome:
+                    if not self.suppressOutput: print("Counting in",self.currentEncompassingFeature.chromosome)
+                    if self.currentEncompassedFeature is not None: self.reconcileChromosomes()
+
+        # Close files open for reading and write the final count.
+        self.encompassedFeaturesFile.close()
+        self.encompassingFeaturesFile.close()
+        self.outputDataHandler.outputDataStructure = encompassmentCount
+        self.outputDataHandler.writer.outputDataStructure = encompassmentCount
+        self.outputDataHandler.writer.writeResults()
 
 
     def count(self):
@@ -298,28 +410,43 @@ class ThisInThatCounter(ABC):
             warnings.warn("Empty file(s) given as input.  Output will most likely be unhelpful.")
         else: self.reconcileChromosomes()
 
+        # If no stratification or tracking is needed, use the specialized (faster) counting loop instead.
+        if self.isSimpleCount():
+            self.countSimple()
+            return
+
+        # Bind the functions called for every encompassed feature to local variables to save on attribute lookups.
+        isEncompassedFeaturePastEncompassingFeature = self.isEncompassedFeaturePastEncompassingFeature
+        isEncompassedFeatureWithinEncompassingFeature = self.isEncompassedFeatureWithinEncompassingFeature
+        onEncompassedFeatureInEncompassingFeature = self.outputDataHandler.onEncompassedFeatureInEncompassingFeature
+        trackConfirmedEncompassedFeature = self.trackConfirmedEncompassedFeature
+        readNextEncompassedFeature = self.readNextEncompassedFeature
+
         # The core loop goes through each encompassing feature, one at a time, and checks encompassed feature positions against it until 
         # one exceeds its rightmost position or is on a different chromosome (or encompassed features are exhausted).  
         # Then, the next encompassing feature is checked, then the next, etc. until none are left.
         while self.currentEncompassingFeature is not None:
 
             # Read mutations until the encompassed feature is past the range of the encompassing feature.
-            while not self.isEncompassedFeaturePastEncompassingFeature():
+            while not isEncompassedFeaturePastEncompassingFeature():
 
                 # Check for any features with confirmed encompassment.
-                if self.isEncompassedFeatureWithinEncompassingFeature():
-                    self.outputDataHandler.onEncompassedFeatureInEncompassingFeature(self.currentEncompassedFeature, self.currentEncompassingFeature, False)
-                    self.confirmedEncompassedFeatures.append(self.currentEncompassedFeature)
+                if isEncompassedFeatureWithinEncompassingFeature():
+                    onEncompassedFeatureInEncompassingFeature(self.currentEncompassedFeature, self.currentEncompassingFeature, False)
+                    if self.tracksReEntry: trackConfirmedEncompassedFeature(self.currentEncompassedFeature)
                     self.isCurrentEncompassedFeatureActuallyEncompassed = True
 
                 # Get data on the next encompassed feature.
-                self.readNextEncompassedFeature()
+                readNextEncompassedFeature()
 
             # Read in a new encompassing feature and check any confirmed encompassed features.
             self.readNextEncompassingFeature()
 
             # Reconcile the encompassed and encompassing features to be sure that they are at the same chromosome for the next iteration
-            self.reconcileChromosomes()
+            # (Only bother calling the reconciliation function when the chromosomes actually differ, which is rare.)
+            if (self.currentEncompassingFeature is not None and self.currentEncompassedFeature is not None and
+                self.currentEncompassingFeature.chromosome != self.currentEncompassedFeature.chromosome):
+                self.reconcileChromosomes()
 
         # Read through any remaining encompassed features in case we are recording non-encompassed features.
         while self.currentEncompassedFeature is not None: self.readNextEncompassedFeature()
@@ -331,7 +458,10 @@ class ThisInThatCounter(ABC):
 
         # Write (or finish writing) as necessary.
         if self.writeIncrementally: self.outputDataHandler.writer.finishIndividualFeatureWriting()
-        else: self.outputDataHandler.writer.writeResults()
+        else:
+            # In the base case, the output data structure is just an integer, so make sure the writer has the final count.
+            self.outputDataHandler.writer.outputDataStructure = self.outputDataHandler.outputDataStructure
+            self.outputDataHandler.writer.writeResults()
 
         # If specified, sort the output using the same parameters for checking for sorted input.
         # (This is useful if encompassed features are larger ranges reduced to midpoints, which
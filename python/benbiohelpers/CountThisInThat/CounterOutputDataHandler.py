@@ -1,8 +1,9 @@
 # The class for parsing, formatting, and writing data from the ThisInThatCounter
+from __future__ import annotations
 from benbiohelpers.CountThisInThat.InputDataStructures import EncompassedData, EncompassingData, ENCOMPASSING_DATA, ENCOMPASSED_DATA
 from benbiohelpers.CountThisInThat.OutputDataStratifiers import *
-from typing import List, Type, Union
-import warnings
+from typing import List, Tuple, Type, Union
+import warnings, itertools
 
 
 class CounterOutputDataHandler:
@@ -33,6 +34,13 @@ class CounterOutputDataHandler:
                                                                                            "if they aren't tracked.")
 
         self.outputDataStratifiers: List[OutputDataStratifier] = list() # The ODS's used to stratify the data.
+        # Bound methods (and supplemental info handlers) for each ODS, cached as they are added so that they don't need to be
+        # looked up for every counted feature.  (See addNewStratifier)
+        self.innerStratificationLevels: Tuple = tuple()
+        self.finalUpdateFunction = None
+        self.finalRelevantKeyFunction = None
+        self.nonCountedEncompassedFeatureFunctions: Tuple = tuple()
+        self.newEncompassingFeatureFunctions: Tuple = tuple()
         self.nontolerantAmbiguityHandling = False # To start, there is no non-tolerant ambiguity handling.
         self.ignoreAmbiguityODSs: List[OutputDataStratifier] = list()
 
@@ -59,15 +67,17 @@ class CounterOutputDataHandler:
         Creates and returns all dictionaries at the object's stratification level in the ODS
         """
 
-        if len(self.outputDataStratifiers) == 0: self.outputDataStructure = dict()
-        dictionariesToReturn = [self.outputDataStructure,]
-        for _ in range(len(self.outputDataStratifiers)):
-            tempDictionariesToReturn = list()
-            for dictionary in dictionariesToReturn:
-                for key in dictionary:
-                    dictionary[key] = dict()
-                    tempDictionariesToReturn.append(dictionary[key])
-            dictionariesToReturn = tempDictionariesToReturn
+        if len(self.outputDataStratifiers) == 0: 
+            self.outputDataStructure = dict()
+            return [self.outputDataStructure,]
+
+        # The dictionaries at the current lowest level are already tracked by the last stratifier, so just replace their values
+        # (which are still counts) with new dictionaries, rather than walking the whole output data structure from the top.
+        dictionariesToReturn = list()
+        for dictionary in self.outputDataStratifiers[-1].outputDataDictionaries:
+            for key in dictionary:
+                dictionary[key] = dict()
+                dictionariesToReturn.append(dictionary[key])
 
         return dictionariesToReturn
 
@@ -79,6 +89,24 @@ class CounterOutputDataHandler:
         self.outputDataStratifiers.append(stratifier)
         if len(self.outputDataStratifiers) > 1: self.outputDataStratifiers[-2].childDataStratifier = stratifier
 
+        # Cache the functions used to update and retrieve keys from each ODS.
+        # NOTE: The supplemental info handler lists are cached by reference, so handlers added later are still seen.
+        self.innerStratificationLevels = tuple((oDS.updateConfirmedEncompassedFeature, oDS.getRelevantKey, oDS.supplementalInfoHandlers)
+                                               for oDS in self.outputDataStratifiers[:-1])
+        self.finalUpdateFunction = stratifier.updateConfirmedEncompassedFeature
+        self.finalRelevantKeyFunction = stratifier.getRelevantKey
+
+        # Most ODS's don't do anything with non-counted encompassed features or new encompassing features, 
+        # so only keep track of the ones that actually override those functions.
+        self.nonCountedEncompassedFeatureFunctions = tuple(
+            oDS.onNonCountedEncompassedFeature for oDS in self.outputDataStratifiers
+            if type(oDS).onNonCountedEncompassedFeature is not OutputDataStratifier.onNonCountedEncompassedFeature
+        )
+        self.newEncompassingFeatureFunctions = tuple(
+            oDS.onNewEncompassingFeature for oDS in self.outputDataStratifiers
+            if type(oDS).onNewEncompassingFeature is not OutputDataStratifier.onNewEncompassingFeature
+        )
+
     
     def addStrandComparisonStratifier(self, strandAmbiguityHandling = AmbiguityHandling.record, outputName = "Strand_Comparison"):
         """
@@ -193,6 +221,34 @@ class CounterOutputDataHandler:
                 "Cannot write individual features unless leading ODS is an encompassed/encompassing feature ODS."
             )
 
+        # Now that the stratifiers are finalized, use a counting function specialized for one or two stratification levels if possible.
+        # (Not possible if supplemental information needs to be updated on count or if countFeature has been overridden.)
+        if (type(self).countFeature is CounterOutputDataHandler.countFeature and
+            not any(oDS.supplementalInfoHandlers for oDS in self.outputDataStratifiers)):
+            if len(self.outputDataStratifiers) == 1: self.countFeature = self.countFeatureOneLevel
+            elif len(self.outputDataStratifiers) == 2: self.countFeature = self.countFeatureTwoLevels
+
+        # Similarly, if all ambiguity is tolerated and nothing is written incrementally, handling encompassed features is just
+        # a matter of updating and counting them, so use the specialized function for that.
+        # If there's also no supplemental information to update, updating and counting can be done in a single pass through the ODS's.
+        if (type(self).onEncompassedFeatureInEncompassingFeature is CounterOutputDataHandler.onEncompassedFeatureInEncompassingFeature and
+            not self.nontolerantAmbiguityHandling and self.encompassedFeaturesToWrite is None and self.encompassingFeaturesToWrite is None):
+            if (self.outputDataStratifiers and type(self).countFeature is CounterOutputDataHandler.countFeature and
+                not any(oDS.supplementalInfoHandlers for oDS in self.outputDataStratifiers)):
+                self.onEncompassedFeatureInEncompassingFeature = self.onEncompassedFeatureInEncompassingFeatureSinglePass
+            else: self.onEncompassedFeatureInEncompassingFeature = self.onEncompassedFeatureInEncompassingFeatureAllTolerant
+
+
+    def needsReEntryTracking(self):
+        """
+        Returns whether or not the counter needs to keep track of encompassed features after they are first found within an encompassing feature
+        so that they can be revisited by subsequent (overlapping) encompassing features and flagged when they exit encompassment.
+        This is needed for counting in overlapping encompassing features, non-tolerant ambiguity handling, and incremental writing,
+        so it is true by default. Children of this class may override it to return false if they know none of these cases apply
+        (e.g. encompassing features are guaranteed not to overlap and ambiguity is tolerated), saving the memory used for tracking.
+        """
+        return True
+
 
     def writeWaitingFeatures(self):
         """
@@ -222,17 +278,26 @@ class CounterOutputDataHandler:
     def updateODSs(self, encompassedFeature, encompassingFeature):
         """
         Updates all relevant values in each ODS using the current encompassed and encompassing features.
+        Returns the relevant keys retrieved for each ODS except the last (so that they can be passed to countFeature), or
+        None if there are no ODS's.
         """
 
-        for outputDataStratifier in self.outputDataStratifiers: 
-            outputDataStratifier.updateConfirmedEncompassedFeature(encompassedFeature, encompassingFeature)
-            if outputDataStratifier is not self.outputDataStratifiers[-1]:
-                if outputDataStratifier is self.outputDataStratifiers[0]: currentODSDict = self.outputDataStructure
-                currentODSDict = currentODSDict[outputDataStratifier.getRelevantKey(encompassedFeature)]
-                for i, supplementalInfoHandler in enumerate(outputDataStratifier.supplementalInfoHandlers):
-                    if supplementalInfoHandler.updateUntilExit:
-                        currentODSDict[SUP_INFO_KEY][i] = supplementalInfoHandler.updateSupplementalInfo(currentODSDict[SUP_INFO_KEY][i], 
-                                                                                                         encompassedFeature, encompassingFeature)
+        if self.finalUpdateFunction is None: return None
+
+        relevantKeys = list()
+        currentODSDict = self.outputDataStructure
+        for updateConfirmedEncompassedFeature, getRelevantKey, supplementalInfoHandlers in self.innerStratificationLevels:
+            updateConfirmedEncompassedFeature(encompassedFeature, encompassingFeature)
+            relevantKey = getRelevantKey(encompassedFeature)
+            relevantKeys.append(relevantKey)
+            currentODSDict = currentODSDict[relevantKey]
+            for i, supplementalInfoHandler in enumerate(supplementalInfoHandlers):
+                if supplementalInfoHandler.updateUntilExit:
+                    currentODSDict[SUP_INFO_KEY][i] = supplementalInfoHandler.updateSupplementalInfo(currentODSDict[SUP_INFO_KEY][i], 
+                                                                                                     encompassedFeature, encompassingFeature)
+        self.finalUpdateFunction(encompassedFeature, encompassingFeature)
+
+        return relevantKeys
 
 
     def onNonCountedEncompassedFeature(self, encompassedFeature: EncompassedData, encompassingFeature: EncompassingData = None):
@@ -241,8 +306,8 @@ class CounterOutputDataHandler:
         """
 
         if self.trackAllEncompassed:
-            for outputDataStratifier in self.outputDataStratifiers: 
-                outputDataStratifier.onNonCountedEncompassedFeature(encompassedFeature)
+            for onNonCountedEncompassedFeature in self.nonCountedEncompassedFeatureFunctions: 
+                onNonCountedEncompassedFeature(encompassedFeature)
             if self.encompassedFeaturesToWrite is not None: self.encompassedFeaturesToWrite.add(encompassedFeature)
             if self.countAllEncompassed: self.countFeature(encompassedFeature, encompassingFeature)
             if self.countNonCountedEncompassedAsNegative: self.countFeature(encompassedFeature, encompassingFeature, -1)
@@ -254,8 +319,8 @@ class CounterOutputDataHandler:
         """
 
         if self.trackAllEncompassing:
-            for outputDataStratifier in self.outputDataStratifiers: 
-                outputDataStratifier.onNewEncompassingFeature(encompassingFeature)
+            for onNewEncompassingFeature in self.newEncompassingFeatureFunctions: 
+                onNewEncompassingFeature(encompassingFeature)
 
 
     def onExitEncompassingFeature(self, encompassingFeature: EncompassingData):
@@ -266,26 +331,46 @@ class CounterOutputDataHandler:
         if self.trackAllEncompassing and self.encompassingFeaturesToWrite is not None: self.encompassingFeaturesToWrite.add(encompassingFeature)
 
 
-    def countFeature(self, encompassedFeature, encompassingFeature, countValue = 1):
+    def countFeature(self, encompassedFeature, encompassingFeature, countValue = 1, relevantKeys = None):
         """
         If count is true, increments the proper object in the output data structure.
         Otherwise, just updates supplemental information.
+        If relevantKeys is given, it should contain the keys for each ODS except the last, as returned by updateODSs
+        for the same features, so that they don't need to be retrieved again.
         """
 
         # Account for the base case where we are just counting all features.
-        if len(self.outputDataStratifiers) == 0: 
+        if self.finalRelevantKeyFunction is None: 
             self.outputDataStructure += countValue
             return
 
         # Drill down through the ODS's using the relevant keys from this encompassed feature to determine where to count.
+        if relevantKeys is None:
+            relevantKeys = [getRelevantKey(encompassedFeature) for _, getRelevantKey, _ in self.innerStratificationLevels]
         currentODSDict = self.outputDataStructure
-        for outputDataStratifier in self.outputDataStratifiers[:-1]:
-            currentODSDict = currentODSDict[outputDataStratifier.getRelevantKey(encompassedFeature)]
-            for i, supplementalInfoHandler in enumerate(outputDataStratifier.supplementalInfoHandlers):
+        for relevantKey, (_, _, supplementalInfoHandlers) in zip(relevantKeys, self.innerStratificationLevels):
+            currentODSDict = currentODSDict[relevantKey]
+            for i, supplementalInfoHandler in enumerate(supplementalInfoHandlers):
                 if supplementalInfoHandler.updateOnCount:
                     currentODSDict[SUP_INFO_KEY][i] = supplementalInfoHandler.updateSupplementalInfo(currentODSDict[SUP_INFO_KEY][i], 
                                                                                                      encompassedFeature, encompassingFeature)
-        currentODSDict[self.outputDataStratifiers[-1].getRelevantKey(encompassedFeature)] += countValue
+        currentODSDict[self.finalRelevantKeyFunction(encompassedFeature)] += countValue
+
+
+    def countFeatureOneLevel(self, encompassedFeature, encompassingFeature, countValue = 1, relevantKeys = None):
+        """
+        A version of countFeature specialized for a single stratification level with no supplemental information.
+        """
+        self.outputDataStructure[self.finalRelevantKeyFunction(encompassedFeature)] += countValue
+
+
+    def countFeatureTwoLevels(self, encompassedFeature, encompassingFeature, countValue = 1, relevantKeys = None):
+        """
+        A version of countFeature specialized for two stratification levels with no supplemental information.
+        """
+        if relevantKeys is None: relevantKey = self.innerStratificationLevels[0][1](encompassedFeature)
+        else: relevantKey = relevantKeys[0]
+        self.outputDataStructure[relevantKey][self.finalRelevantKeyFunction(encompassedFeature)] += countValue
 
 
     def checkFeatureStatus(self, encompassedFeature, exitingEncompassment):
@@ -336,17 +421,20 @@ class CounterOutputDataHandler:
         # Record the encompassing feature if they are being written incrementally.
         if self.encompassingFeaturesToWrite is not None: self.encompassingFeaturesToWrite.add(encompassingFeature)
 
-        # First, update the encompassed feature and supplemental information based on the given encompassing feature unless it is exiting encompassment.
-        if not exitingEncompassment: self.updateODSs(encompassedFeature, encompassingFeature)
+        # If the feature is not exiting encompassment, update the encompassed feature and supplemental information based on the given
+        # encompassing feature.  Then, if we don't have nontolerant ambiguity handling, count the feature!
+        # (This is by far the most common case, so it is checked first.)
+        if not exitingEncompassment:
+            relevantKeys = self.updateODSs(encompassedFeature, encompassingFeature)
+            if not self.nontolerantAmbiguityHandling: self.countFeature(encompassedFeature, encompassingFeature, relevantKeys = relevantKeys)
 
-        # If we don't have nontolerant ambiguity handling, and are not exiting encompassment, count the feature!
-        # Otherwise, if we are exiting encompassment, check to see if we need to add this to the list of features to write.
-        if not self.nontolerantAmbiguityHandling: 
-            if not exitingEncompassment: self.countFeature(encompassedFeature, encompassingFeature)
-            elif self.encompassedFeaturesToWrite is not None: self.encompassedFeaturesToWrite.add(encompassedFeature)
+        # Otherwise, if we are exiting encompassment without nontolerant ambiguity handling, 
+        # check to see if we need to add this to the list of features to write.
+        elif not self.nontolerantAmbiguityHandling:
+            if self.encompassedFeaturesToWrite is not None: self.encompassedFeaturesToWrite.add(encompassedFeature)
 
         # If we have nontolerant ambiguity handling and are exiting encompassment, handle the features accordingly.
-        elif exitingEncompassment:
+        else:
 
             ignoreFeature = False
             for oDS in self.ignoreAmbiguityODSs:
@@ -359,6 +447,33 @@ class CounterOutputDataHandler:
                 if self.encompassedFeaturesToWrite is not None: self.encompassedFeaturesToWrite.add(encompassedFeature)
 
 
+    def onEncompassedFeatureInEncompassingFeatureAllTolerant(self, encompassedFeature: EncompassedData, encompassingFeature: EncompassingData,
+                                                             exitingEncompassment):
+        """
+        A version of onEncompassedFeatureInEncompassingFeature specialized for when all ambiguity is tolerated and no features are
+        being written incrementally.  In this case, features are updated and counted every time they are encompassed, and nothing
+        needs to be done when they exit encompassment.
+        """
+        if not exitingEncompassment:
+            self.countFeature(encompassedFeature, encompassingFeature, relevantKeys = self.updateODSs(encompassedFeature, encompassingFeature))
+
+
+    def onEncompassedFeatureInEncompassingFeatureSinglePass(self, encompassedFeature: EncompassedData, encompassingFeature: EncompassingData,
+                                                            exitingEncompassment):
+        """
+        Like onEncompassedFeatureInEncompassingFeatureAllTolerant, but for when there is also no supplemental information.
+        The ODS's are updated and the feature is counted in a single pass, retrieving each key right after its ODS is updated.
+        """
+        if exitingEncompassment: return
+
+        currentODSDict = self.outputDataStructure
+        for updateConfirmedEncompassedFeature, getRelevantKey, _ in self.innerStratificationLevels:
+            updateConfirmedEncompassedFeature(encompassedFeature, encompassingFeature)
+            currentODSDict = currentODSDict[getRelevantKey(encompassedFeature)]
+        self.finalUpdateFunction(encompassedFeature, encompassingFeature)
+        currentODSDict[self.finalRelevantKeyFunction(encompassedFeature)] += 1
+
+
 class OutputDataWriter():
 
     def __init__(self, outputDataStructure, outputDataStratifiers, outputFilePath: str,
@@ -398,9 +513,13 @@ class OutputDataWriter():
         self.outputDataStructure = outputDataStructure
         self.outputDataStratifiers: List[OutputDataStratifier] = outputDataStratifiers
         self.outputFilePath = outputFilePath
-        self.outputFile = open(outputFilePath, 'w')
+        self.outputFile = open(outputFilePath, 'w', buffering = 1024*1024)
 
         self.oDSSubs = oDSSubs
+        # For each data level that is appended to the data line (None in oDSSubs), precompute the column it is appended at,
+        # so that it doesn't need to be recounted for every value written.
+        if self.oDSSubs is None: self.oDSSubsAppendedCols = None
+        else: self.oDSSubsAppendedCols = [self.oDSSubs[:dataLevel].count(None) for dataLevel in range(len(self.oDSSubs))]
         self.customStratifyingNames = customStratifyingNames
         self.currentDataRow = None
         self.omitZeroRows = omitZeroRows
@@ -478,7 +597,7 @@ class OutputDataWriter():
         elif self.oDSSubs[dataLevel] == -1:
             pass
         elif self.oDSSubs[dataLevel] is None:
-            self.currentDataRow[self.oDSSubs[:dataLevel].count(None)] = value
+            self.currentDataRow[self.oDSSubsAppendedCols[dataLevel]] = value
         else: self.currentDataRow[0][self.oDSSubs[dataLevel]] = value
 
 
@@ -495,45 +614,111 @@ class OutputDataWriter():
 
     def writeDataRows(self, currentDataObject, stratificationLevel, supplementalInfoCount):
         """
-        Uses the self.currentDataRow object to recursively write all possible data rows that can be constructed using information at or below
+        Uses the self.currentDataRow object to write all possible data rows that can be constructed using information at or below
         the given stratification level for a given data object (dictionary) at that same stratification level.
+        Rows are generated iteratively from every combination of keys in the non-final stratification levels.
         """
 
-        # If we're not at the final level of the data structure, iterate through it, recursively calling this function on the results.
-        if stratificationLevel + 1 != len(self.outputDataStratifiers):
-            for key in self.outputDataStratifiers[stratificationLevel].getKeysForOutput():
+        finalStratificationLevel = len(self.outputDataStratifiers) - 1
 
-                self.setDataCol(stratificationLevel + supplementalInfoCount, self.getOutputName(stratificationLevel, key))
-                self.previousKeys[stratificationLevel] = key
+        # Use the specialized writer for the common case of two stratification levels (e.g. position x strand), if possible.
+        if (finalStratificationLevel == 1 and stratificationLevel == 0 and self.oDSSubs is None and 
+            not self.omitFinalStratificationCounts and not self.outputDataStratifiers[0].supplementalInfoHandlers):
+            self.writeTwoLevelDataRows(currentDataObject)
+            return
 
-                supplementalInfoHandlers = self.outputDataStratifiers[stratificationLevel].supplementalInfoHandlers
-                for i, supplementalInfoHandler in enumerate(supplementalInfoHandlers):
-                    supplementalInfo = supplementalInfoHandler.getFormattedOutput(currentDataObject[key][SUP_INFO_KEY][i])
-                    self.setDataCol(stratificationLevel + supplementalInfoCount + i + 1, supplementalInfo)
+        nonFinalLevels = range(stratificationLevel, finalStratificationLevel)
 
-                self.writeDataRows(currentDataObject[key], stratificationLevel + 1, supplementalInfoCount + len(supplementalInfoHandlers))
+        # Determine the data column for each non-final level's key (accounting for supplemental info columns),
+        # and the data column where the final level's counts begin.
+        keyDataCols = list()
+        for level in nonFinalLevels:
+            keyDataCols.append(level + supplementalInfoCount)
+            supplementalInfoCount += len(self.outputDataStratifiers[level].supplementalInfoHandlers)
+        countsDataCol = finalStratificationLevel + supplementalInfoCount
+
+        finalKeys = self.outputDataStratifiers[finalStratificationLevel].getKeysForOutput()
+        if self.omitFinalStratificationCounts: countDerivativesDataCol = countsDataCol + 1
+        else: countDerivativesDataCol = countsDataCol + len(finalKeys)
+
+        # Retrieve the keys and their output names for each non-final level once, up front.
+        keysPerLevel = [self.outputDataStratifiers[level].getKeysForOutput() for level in nonFinalLevels]
+        outputNamesPerLevel = [[self.getOutputName(level, key) for key in keys] for level, keys in zip(nonFinalLevels, keysPerLevel)]
+
+        # dataObjects[i] holds the dictionary for the i'th level (relative to the starting stratification level) of the current key combination.
+        dataObjects = [currentDataObject] + [None]*len(nonFinalLevels)
+        previousKeyIndices = None
+
+        # Rows are collected and written all at once at the end.
+        dataRows = list()
+
+        for keyIndices in itertools.product(*(range(len(keys)) for keys in keysPerLevel)):
+
+            # Find the first level whose key changed since the last row, and update the data row from there down.
+            firstChangedLevel = 0
+            if previousKeyIndices is not None:
+                while keyIndices[firstChangedLevel] == previousKeyIndices[firstChangedLevel]: firstChangedLevel += 1
+            previousKeyIndices = keyIndices
+
+            for i in range(firstChangedLevel, len(keyIndices)):
+                level = stratificationLevel + i
+                key = keysPerLevel[i][keyIndices[i]]
+                self.setDataCol(keyDataCols[i], outputNamesPerLevel[i][keyIndices[i]])
+                self.previousKeys[level] = key
+
+                for j, supplementalInfoHandler in enumerate(self.outputDataStratifiers[level].supplementalInfoHandlers):
+                    supplementalInfo = supplementalInfoHandler.getFormattedOutput(dataObjects[i][key][SUP_INFO_KEY][j])
+                    self.setDataCol(keyDataCols[i] + j + 1, supplementalInfo)
+
+                dataObjects[i+1] = dataObjects[i][key]
+
+            # Add the entries in the final dictionary (which should be integers representing counts) to the data row 
+            # along with any count derivatives and write the row.
+            finalDataObject = dataObjects[-1]
 
-        # Otherwise, add the entries in this dictionary (which should be integers representing counts) to the data row 
-        # along with any count derivatives and write the row.
-        else:
             # Initialize the omission flag to true if necessary.
             if self.omitZeroRows: omitRow = True
             else: omitRow = False
 
-            for i, key in enumerate(self.outputDataStratifiers[stratificationLevel].getKeysForOutput()):
-                counts = currentDataObject[key]
+            for i, key in enumerate(finalKeys):
+                counts = finalDataObject[key]
                 if counts != 0: omitRow = False
                 if not self.omitFinalStratificationCounts:
-                    self.setDataCol(stratificationLevel + supplementalInfoCount + i, str(counts))
-            if self.omitFinalStratificationCounts: i = 0
+                    self.setDataCol(countsDataCol + i, str(counts))
 
-            if omitRow: return
+            if omitRow: continue
 
-            self.currentDataRow[stratificationLevel + supplementalInfoCount + i + 1:] = self.getCountDerivatives(False)
+            self.currentDataRow[countDerivativesDataCol:] = self.getCountDerivatives(False)
 
             if isinstance(self.currentDataRow[0],list):
-                self.outputFile.write('\t'.join(['\t'.join(self.currentDataRow[0])] + self.currentDataRow[1:]) + '\n')
-            else: self.outputFile.write('\t'.join(self.currentDataRow) + '\n')
+                dataRows.append('\t'.join(['\t'.join(self.currentDataRow[0])] + self.currentDataRow[1:]) + '\n')
+            else: dataRows.append('\t'.join(self.currentDataRow) + '\n')
+
+        self.outputFile.writelines(dataRows)
+
+
+    def writeTwoLevelDataRows(self, currentDataObject):
+        """
+        A specialized version of writeDataRows for writing all results when there are exactly two stratification levels, and no
+        supplemental information, oDSSubs, or omission of final stratification counts need to be accounted for.
+        Each row is just the output name for the first level's key followed by its counts and count derivatives, so rows are built directly
+        instead of through the currentDataRow object.
+        """
+
+        finalKeys = self.outputDataStratifiers[1].getKeysForOutput()
+        dataRows = list()
+
+        for key in self.outputDataStratifiers[0].getKeysForOutput():
+
+            self.previousKeys[0] = key
+            finalDataObject = currentDataObject[key]
+            counts = [finalDataObject[finalKey] for finalKey in finalKeys]
+            if self.omitZeroRows and not any(count != 0 for count in counts): continue
+
+            dataRows.append('\t'.join([self.getOutputName(0, key)] + [str(count) for count in counts] +
+                                      self.getCountDerivatives(False)) + '\n')
+
+        self.outputFile.writelines(dataRows)
 
 
     def writeFeature(self, featureToWrite: Union[EncompassingData, EncompassedData]):
@@ -64,6 +64,7 @@ class OutputDataStratifier(ABC):
         Initializes the object by setting default values using the given parameters.
         """
         self.ambiguityHandling = ambiguityHandling # See related enum
+        self.toleratesAmbiguity = ambiguityHandling is AmbiguityHandling.tolerate # Checked for every key retrieval, so store it as a simple bool.
         self.outputDataDictionaries: List[Dict] = outputDataDictionaries
         self.allKeys = set()
         self.sortedKeys = None
@@ -229,7 +230,7 @@ class OutputDataStratifier(ABC):
         ambiguity handling to decide whether or not to return a value.
         """
         data, ambiguous = encompassedFeature.getStratifierData(type(self))
-        if self.ambiguityHandling == AmbiguityHandling.tolerate or not ambiguous: return data
+        if self.toleratesAmbiguity or not ambiguous: return data
         else: return None
 
 
@@ -341,7 +342,7 @@ class RelativePosODS(OutputDataStratifier):
         Gets the position of the encompassed feature relative to its encompassing feature as the key.
         """       
         relativePos, ambiguousRelativePos = encompassedFeature.getStratifierData(type(self))
-        if self.ambiguityHandling == AmbiguityHandling.tolerate or not ambiguousRelativePos:
+        if self.toleratesAmbiguity or not ambiguousRelativePos:
 
             # We also need to keep track of whether or not half and int positions have been used at least once.
             if not self.usedIntPosition and relativePos in self.relativePosIntPositions:
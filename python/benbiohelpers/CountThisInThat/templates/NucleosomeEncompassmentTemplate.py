@@ -22,9 +22,11 @@ class MutationsInNucleosomesCounter(ThisInThatCounter):
         """
         if getHeaders: return ["Both_Strands_Counts", "Aligned_Strands_Counts"]
         else:
-            thisPlusCounts = outputDataWriter.outputDataStructure[outputDataWriter.previousKeys[0]][True]
-            thisMinusCounts = outputDataWriter.outputDataStructure[outputDataWriter.previousKeys[0]][False]
-            oppositeMinusCounts = outputDataWriter.outputDataStructure[-outputDataWriter.previousKeys[0]][False]
+            relativePos = outputDataWriter.previousKeys[0]
+            thisPositionCounts = outputDataWriter.outputDataStructure[relativePos]
+            thisPlusCounts = thisPositionCounts[True]
+            thisMinusCounts = thisPositionCounts[False]
+            oppositeMinusCounts = outputDataWriter.outputDataStructure[-relativePos][False]
             return [str(thisPlusCounts+thisMinusCounts),str(thisPlusCounts+oppositeMinusCounts)]
 
     def initOutputDataHandler(self):
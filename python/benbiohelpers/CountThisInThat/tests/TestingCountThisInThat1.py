@@ -1,4 +1,5 @@
 # This script is testing the CountThisInThat classes by replicating my previous code that counts mutations in nucleosomes for comparison.
+from __future__ import annotations
 import timeit
 
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
@@ -12,9 +13,11 @@ from benbiohelpers.CountThisInThat.CounterOutputDataHandler import AmbiguityHand
 def getCountDerivatives(outputDataWriter: OutputDataWriter, getHeaders):
     if getHeaders: return ["Both_Strands_Counts", "Aligned_Strands_Counts"]
     else:
-        thisPlusCounts = outputDataWriter.outputDataStructure[outputDataWriter.previousKeys[0]][True]
-        thisMinusCounts = outputDataWriter.outputDataStructure[outputDataWriter.previousKeys[0]][False]
-        oppositeMinusCounts = outputDataWriter.outputDataStructure[-outputDataWriter.previousKeys[0]][False]
+        relativePos = outputDataWriter.previousKeys[0]
+        thisPositionCounts = outputDataWriter.outputDataStructure[relativePos]
+        thisPlusCounts = thisPositionCounts[True]
+        thisMinusCounts = thisPositionCounts[False]
+        oppositeMinusCounts = outputDataWriter.outputDataStructure[-relativePos][False]
         return [str(thisPlusCounts+thisMinusCounts),str(thisPlusCounts+oppositeMinusCounts)]
 
 
@@ -0,0 +1,76 @@
+from benbiohelpers.CountThisInThat.Counter import ThisInThatCounter
+import pytest, random
+
+class SimpleCounter(ThisInThatCounter): pass
+
+class GeneralLoopCounter(ThisInThatCounter):
+    def isSimpleCount(self): return False
+
+class SameStrandCounter(ThisInThatCounter):
+    def isEncompassedFeatureWithinEncompassingFeature(self, encompassedFeature = None, encompassingFeature = None):
+        if encompassedFeature is None: encompassedFeature = self.currentEncompassedFeature
+        if encompassingFeature is None: encompassingFeature = self.currentEncompassingFeature
+        return (encompassedFeature.strand == encompassingFeature.strand and
+                super().isEncompassedFeatureWithinEncompassingFeature(encompassedFeature, encompassingFeature))
+
+class SameStrandGeneralLoopCounter(SameStrandCounter):
+    def isSimpleCount(self): return False
+
+
+def writeBedFile(filePath, features):
+    with open(filePath, 'w') as bedFile:
+        for chromosome, start, end, strand in sorted(features):
+            bedFile.write(f"{chromosome}\t{start}\t{end}\t.\t.\t{strand}\n")
+
+
+def getCount(counterClass, encompassedFilePath, encompassingFilePath, outputFilePath, **kwargs):
+    counter = counterClass(str(encompassedFilePath), str(encompassingFilePath), str(outputFilePath), suppressOutput = True, **kwargs)
+    isSimpleCount = counter.isSimpleCount()
+    counter.count()
+    with open(outputFilePath, 'r') as outputFile: return int(outputFile.read().strip()), isSimpleCount
+
+
+@pytest.fixture
+def randomBedFiles(tmp_path):
+    random.seed(1)
+    encompassedFeatures = list(); encompassingFeatures = list()
+    for chromosome in ("chr1", "chr2", "chr3"):
+        for _ in range(2000):
+            position = random.randrange(100000)
+            encompassedFeatures.append((chromosome, position, position + 1, random.choice("+-")))
+        # Skip encompassing features on chr2 so that chromosome reconciliation is tested too.
+        if chromosome == "chr2": continue
+        for _ in range(300):
+            start = random.randrange(100000)
+            encompassingFeatures.append((chromosome, start, start + random.randrange(1, 2000), random.choice("+-")))
+    writeBedFile(tmp_path / "encompassed.bed", encompassedFeatures)
+    writeBedFile(tmp_path / "encompassing.bed", encompassingFeatures)
+    return tmp_path / "encompassed.bed", tmp_path / "encompassing.bed"
+
+
+@pytest.mark.parametrize("extraRadius", [0, 30])
+def test_count_simple_matches_general_loop(randomBedFiles, tmp_path, extraRadius):
+    simpleCount, usedSimpleCount = getCount(SimpleCounter, *randomBedFiles, tmp_path / "simple.txt",
+                                            encompassingFeatureExtraRadius = extraRadius)
+    generalCount, usedGeneralLoop = getCount(GeneralLoopCounter, *randomBedFiles, tmp_path / "general.txt",
+                                             encompassingFeatureExtraRadius = extraRadius)
+    assert usedSimpleCount and not usedGeneralLoop
+    assert simpleCount == generalCount
+
+
+def test_overridden_functions_use_general_loop(randomBedFiles, tmp_path):
+    count, usedSimpleCount = getCount(SameStrandCounter, *randomBedFiles, tmp_path / "same_strand.txt")
+    generalCount, _ = getCount(SameStrandGeneralLoopCounter, *randomBedFiles, tmp_path / "same_strand_general.txt")
+    allStrandsCount, _ = getCount(SimpleCounter, *randomBedFiles, tmp_path / "all_strands.txt")
+    assert not usedSimpleCount
+    assert count == generalCount
+    assert count < allStrandsCount
+
+
+def test_overridden_functions_minimal_case(tmp_path):
+    writeBedFile(tmp_path / "encompassed.bed", [("chr1", 10, 11, '+'), ("chr1", 12, 13, '-')])
+    writeBedFile(tmp_path / "encompassing.bed", [("chr1", 0, 100, '+')])
+    assert getCount(SameStrandCounter, tmp_path / "encompassed.bed", tmp_path / "encompassing.bed",
+                    tmp_path / "output.txt") == (1, False)
+    assert getCount(SimpleCounter, tmp_path / "encompassed.bed", tmp_path / "encompassing.bed",
+                    tmp_path / "output.txt") == (2, True)
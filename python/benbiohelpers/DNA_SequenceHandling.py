@@ -4,13 +4,18 @@
 reverser = {'A':'T','T':'A','G':'C','C':'G','N':'N',
             'a':'t','t':'a','g':'c','c':'g','n':'n'}
 
+# Translation tables for swapping each base with its compliment and for finding any unexpected characters.
+reverseComplimentTranslator = str.maketrans(reverser)
+validBaseRemover = str.maketrans(dict.fromkeys(reverser))
+
 def reverseCompliment(DNA):
 
-    #Reverse the string using a nifty map!
-    reverseComplimentMap = map(lambda base: reverser[base], DNA[::-1])
-    reverseComplimentList = list(reverseComplimentMap)
-    reverseCompliment = ''.join(reverseComplimentList)
-    return reverseCompliment
+    # Make sure there aren't any characters we don't know how to compliment.
+    invalidCharacters = DNA.translate(validBaseRemover)
+    if invalidCharacters: raise KeyError(invalidCharacters[0])
+
+    # Compliment the bases with the translation table, then reverse the string.
+    return DNA.translate(reverseComplimentTranslator)[::-1]
 
 # Why are these two words so similar... :(
 # Is there an easy way to refactor this?
@@ -4,7 +4,7 @@ from benbiohelpers.FileSystemHandling.BedToFasta import bedToFasta
 from benbiohelpers.FileSystemHandling.FastaFileIterator import FastaFileIterator
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
 
-import os
+import os, shutil, tempfile
 
 def addSequenceToBed(bedFilePath: str, genomeFastaFilePath: str, substitutionPosition = None, verbose = False):
     """
@@ -12,42 +12,53 @@ def addSequenceToBed(bedFilePath: str, genomeFastaFilePath: str, substitutionPos
     if a value is supplied, or they are appended to a new column if it is None.
     """
 
-    # Get the names of intermediate files from the bed file name.
+    # Get the name of the intermediate fasta file from the bed file name.
     fastaSequencesFilePath = bedFilePath.rsplit('.',1)[0] + "_sequences.fa"
-    newBedFilePath = bedFilePath.rsplit('.',1)[0] + "_NEW.bed"
 
     # Generate the fasta sequences file.
     if verbose: print("Generating fasta sequences file...")
     bedToFasta(bedFilePath, genomeFastaFilePath, fastaSequencesFilePath)
 
     # Open both the fasta sequence file and original bed file to read from and the new bed file to write to.
+    # NOTE: The new bed file is a temporary file in the same directory as the original so that
+    #       replacing the original at the end is an atomic rename rather than a copy.
+    #       If anything goes wrong before then, the temporary file is removed so it isn't left behind in the data directory.
     if verbose: print("Writing fasta sequences to new bed file...")
-    with open(bedFilePath, 'r') as bedFile:
-        with open(fastaSequencesFilePath, 'r') as fastaSequencesFile:
-            with open(newBedFilePath, 'w') as newBedFile:
+    newBedFile = tempfile.NamedTemporaryFile('w', suffix = ".bed", dir = os.path.dirname(bedFilePath) or '.',
+                                             delete = False, buffering = 1024*1024)
+    try:
+        with open(bedFilePath, 'r') as bedFile, open(fastaSequencesFilePath, 'r') as fastaSequencesFile, newBedFile:
 
-                fastaFileIterator = FastaFileIterator(fastaSequencesFile)
+            fastaFileIterator = FastaFileIterator(fastaSequencesFile)
 
-                # For every line in the bed file, grab it and the accompanying fasta sequence and write them to the new file!
-                for fastaEntry in fastaFileIterator:
+            # For every line in the bed file, grab it and the accompanying fasta sequence and write them to the new file!
+            for fastaEntry in fastaFileIterator:
 
-                    bedColumns = bedFile.readline().split()
-                    fastaSequence = fastaEntry.sequence
-                    assert bedColumns, "No bed line found to accompany fasta sequence: " + fastaSequence
+                bedColumns = bedFile.readline().split()
+                fastaSequence = fastaEntry.sequence
+                assert bedColumns, "No bed line found to accompany fasta sequence: " + fastaSequence
 
-                    if substitutionPosition is None: bedColumns.append(fastaSequence)
-                    else: bedColumns[substitutionPosition] = fastaSequence
+                if substitutionPosition is None: bedColumns.append(fastaSequence)
+                else: bedColumns[substitutionPosition] = fastaSequence
 
-                    newBedFile.write('\t'.join(bedColumns) + '\n')
+                newBedFile.write('\t'.join(bedColumns) + '\n')
 
-                # Make sure the files had the same number of lines.
-                checkBedFile = bedFile.readline()
-                assert not checkBedFile, "Extra bed line found: " + checkBedFile
+            # Make sure the files had the same number of lines.
+            checkBedFile = bedFile.readline()
+            assert not checkBedFile, "Extra bed line found: " + checkBedFile
 
-    # Clean up files by deleting the intermediate sequences file and replacing the old bed file with the new one.
-    if verbose: print("Success!  Deleting intermediate fasta sequences file and replacing old bed file...")
+        # Replace the old bed file with the new one.
+        if verbose: print("Success!  Replacing old bed file and deleting intermediate fasta sequences file...")
+        shutil.copymode(bedFilePath, newBedFile.name) # Temporary files are only readable by their owner by default.
+        os.replace(newBedFile.name, bedFilePath)
+
+    except BaseException:
+        newBedFile.close()
+        os.remove(newBedFile.name)
+        raise
+
+    # Clean up files by deleting the intermediate sequences file.
     os.remove(fastaSequencesFilePath)
-    os.replace(newBedFilePath, bedFilePath)
 
 
 def main():
@@ -8,6 +8,9 @@ from benbiohelpers.FileSystemHandling.FastaFileIterator import FastaFileIterator
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
 from benbiohelpers.CustomErrors import UserInputError
 
+# The number of bed lines to collect before writing them to an output file all at once.
+WRITE_BATCH_SIZE = 4096
+
 
 def expandSequenceContext(inputBedFilePaths: List[str], genomeFilePath, expansionNum, writeColumn = None, 
                           outputFilePathSuffix = "_expanded", customOutputDirectory = None, verbose = True):
@@ -35,10 +38,11 @@ def expandSequenceContext(inputBedFilePaths: List[str], genomeFilePath, expansio
         expandedFilePaths.append(expandedOutputFilePath)
 
         # Create the intermediate bed file with expanded positions.
-        with open(intermediateExpansionFilePath,'w') as intermediateExpansionFile:
+        with open(intermediateExpansionFilePath,'w', buffering = 1024*1024) as intermediateExpansionFile:
             with open(inputBedFilePath, 'r') as inputBedFile:
 
                 if verbose: print("Writing expanded indicies to intermediate bed file...")
+                intermediateExpansionLines = list()
                 for line in inputBedFile:
 
                     # Get a list of all the arguments for a single entry in the bed file.
@@ -52,10 +56,15 @@ def expandSequenceContext(inputBedFilePaths: List[str], genomeFilePath, expansio
 
                     # Write the results to the intermediate expansion file as long as it is not at the start of the chromosome.
                     if int(startPos) > -1: 
-                        intermediateExpansionFile.write("\t".join((chromosome, startPos, endPos, '.', '.', strand))+"\n")
+                        intermediateExpansionLines.append("\t".join((chromosome, startPos, endPos, '.', '.', strand)))
+                        if len(intermediateExpansionLines) == WRITE_BATCH_SIZE:
+                            intermediateExpansionFile.write('\n'.join(intermediateExpansionLines) + '\n')
+                            intermediateExpansionLines.clear()
                     else: print(f"Entry at chromosome {chromosome} with expanded start pos {startPos} "
                                 "extends into invalid positions.  Skipping.")
 
+                if intermediateExpansionLines: intermediateExpansionFile.write('\n'.join(intermediateExpansionLines) + '\n')
+
         # Create the fasta file from the intermediate expansion file.
         if verbose: print("Generating fasta file from expanded bed file...")
         bedToFasta(intermediateExpansionFilePath, genomeFilePath, intermediateFastaFilePath)
@@ -64,9 +73,10 @@ def expandSequenceContext(inputBedFilePaths: List[str], genomeFilePath, expansio
         if verbose: print("Using fasta file to write expanded context to new bed file...")
         with open(inputBedFilePath, 'r') as inputBedFile:
             with open(intermediateFastaFilePath, 'r') as fastaReadsFile:
-                with open(expandedOutputFilePath, 'w') as expandedOutputFile:
+                with open(expandedOutputFilePath, 'w', buffering = 1024*1024) as expandedOutputFile:
 
                     # Work through the un-expanded bed file one mutation at a time.
+                    expandedOutputLines = list()
                     for fastaEntry in FastaFileIterator(fastaReadsFile):
 
                         # Find the un-expanded entry corresponding to this entry.
@@ -89,8 +99,13 @@ def expandSequenceContext(inputBedFilePaths: List[str], genomeFilePath, expansio
                         if writeColumn is None: choppedUpLine.append(fastaEntry.sequence)
                         else: choppedUpLine[writeColumn] = fastaEntry.sequence
 
-                        # Write the result to the new expanded context file.
-                        expandedOutputFile.write("\t".join(choppedUpLine)+"\n")
+                        # Queue the result to be written to the new expanded context file.
+                        expandedOutputLines.append("\t".join(choppedUpLine))
+                        if len(expandedOutputLines) == WRITE_BATCH_SIZE:
+                            expandedOutputFile.write('\n'.join(expandedOutputLines) + '\n')
+                            expandedOutputLines.clear()
+
+                    if expandedOutputLines: expandedOutputFile.write('\n'.join(expandedOutputLines) + '\n')
 
     return expandedFilePaths
 
@@ -65,12 +65,9 @@ class FastaFileIterator:
             """
             Reverses the fasta entry creation process to produce a string that can be rewritten to a file.
             """
-            fastaStringForWriting = f">{self.sequenceName}\n"
-            i = 0
-            while i < len(self.sequence):
-                fastaStringForWriting += self.sequence[i:i+50] + '\n'
-                i += 50
-            return fastaStringForWriting
+            # Split the sequence into 50 character lines, joining them all at once at the end.
+            sequenceLines = [self.sequence[i:i+50] + '\n' for i in range(0, len(self.sequence), 50)]
+            return f">{self.sequenceName}\n" + ''.join(sequenceLines)
 
 
     # Initialize the FastaFileIterator with an open fasta file object.
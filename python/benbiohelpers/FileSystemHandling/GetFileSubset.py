@@ -1,15 +1,41 @@
 # This script contains a function for subsetting a file, potentially at intermediate positions.
 # This is especially helpful for subsetting fastq files which tend to be lower quality at the
 # beginning. There is also a helper function for subsetting fastq files specifically.
-import os, gzip
+import os, gzip, io, shutil, signal, subprocess
+from contextlib import contextmanager
 from benbiohelpers.TkWrappers.TkinterDialog import TkinterDialog
 
+
+@contextmanager
+def openGzippedFileForReading(filePath: str):
+    """
+    Opens the given gzipped file for reading text. Decompression is handed off to a separate process so that it
+    can overlap with reading, using rapidgzip or pigz (which use multiple threads) if available, or gzip otherwise.
+    If none of these are available, python's gzip module is used.
+    """
+
+    if shutil.which("rapidgzip") is not None: decompressionArguments = ("rapidgzip", "-d", "-c", "-P", str(os.cpu_count()), filePath)
+    elif shutil.which("pigz") is not None: decompressionArguments = ("pigz", "-dc", filePath)
+    elif shutil.which("gzip") is not None: decompressionArguments = ("gzip", "-dc", filePath)
+    else:
+        with gzip.open(filePath, "rt") as gzippedFile: yield gzippedFile
+        return
+
+    with subprocess.Popen(decompressionArguments, stdout = subprocess.PIPE, bufsize = 1024*1024) as decompressionProcess:
+        yield io.TextIOWrapper(decompressionProcess.stdout)
+    # Make sure decompression didn't fail (e.g. from a corrupt, truncated, or non-gzipped file).
+    # A broken pipe is expected if the file wasn't read to the end, though.
+    if decompressionProcess.returncode not in (0, -signal.SIGPIPE):
+        raise subprocess.CalledProcessError(decompressionProcess.returncode, decompressionArguments)
+
+
 def getFileSubset(filePath: str, startPos = 0, endPos = 1, fileSuffix = "_test_subset", outputDir = None):
     """
     This function subsets a given file by writing the lines from the start position (0-based) to the
     end position (1-based). The subsetted file is renamed based on the fileSuffix parameter and
     written to a given directory (The same directory as the input file by default).
-    If the file is gzipped, this state is maintained in the subset.
+    If the file is gzipped, this state is maintained in the subset. (Though the subset is compressed
+    at the fastest level, since it is not expected to stick around.)
     Returns the path to the new subset file.
     """
 
@@ -25,17 +51,19 @@ def getFileSubset(filePath: str, startPos = 0, endPos = 1, fileSuffix = "_test_s
     if gzipped:
         splitFilePath = os.path.basename(filePath).rsplit('.',2)
         outputFileBaseName = '.'.join([splitFilePath[0] + fileSuffix]+splitFilePath[1:])
-        openFunction = gzip.open
+        openInputFunction = openGzippedFileForReading
+        openOutputFunction = lambda outputFilePath: gzip.open(outputFilePath, "wt", compresslevel = 1)
     else:
         splitFilePath = os.path.basename(filePath).rsplit('.',1)
         outputFileBaseName = splitFilePath[0] + fileSuffix + '.' + splitFilePath[1]
-        openFunction = open
+        openInputFunction = lambda filePath: open(filePath, "rt")
+        openOutputFunction = lambda outputFilePath: open(outputFilePath, "wt")
 
     outputFilePath = os.path.join(outputDir, outputFileBaseName)
 
     # Open the files 
-    with openFunction(filePath, "rt") as inputFile:
-        with openFunction(outputFilePath, 'wt') as outputFile:
+    with openInputFunction(filePath) as inputFile:
+        with openOutputFunction(outputFilePath) as outputFile:
 
             # Skip lines as necessary. (Also make sure we don't reach EOF here.)
             for _ in range(startPos):
@@ -1,9 +1,33 @@
 # This script features a class which iterates through Sam file objects.
+import re
 from typing import IO, List, Dict
 from benbiohelpers.DNA_SequenceHandling import reverseCompliment
 
 reverseComplimentTranslator = str.maketrans("ACTGactg","TGACtgac")
 
+# Splits a mismatch designations (MD) string into its individual entries: numbers of matches,
+# mismatched nucleotides, and deleted nucleotides (preceded by '^').
+mismatchDesignationsTokenizer = re.compile(r"\d+|\^[A-Za-z]+|[A-Za-z]")
+
+# Splits a CIGAR string into its individual components (number-operation pairs).
+cigarTokenizer = re.compile(r"(\d+)([A-Z=])")
+
+
+def getOptionalFieldValue(optionalFields: str, tag: str):
+    """
+    Returns the value for the given tag (e.g. "MD:Z:") from a sam read's optional fields, given as a single
+    tab-separated string, or None if the tag is not present. The fields may be in any order.
+    """
+    tagPosition = optionalFields.find(tag)
+    while tagPosition > 0 and optionalFields[tagPosition-1] != '\t':
+        tagPosition = optionalFields.find(tag, tagPosition+1)
+    if tagPosition == -1: return None
+
+    valueStart = tagPosition + len(tag)
+    valueEnd = optionalFields.find('\t', valueStart)
+    if valueEnd == -1: return optionalFields[valueStart:]
+    else: return optionalFields[valueStart:valueEnd]
+
 class SamFileIterator:
     """
     Parses sam files one read at a time.
@@ -95,14 +119,10 @@ class SamFileIterator:
             By default, uses the read sequence, but if the related parameter is set to False, uses the reference sequence
             the read aligned to.
             """
-            fastaStringForWriting = f">{self.chromosome}:{self.startPos}-{self.endPos}({self.strand})\n"
-            i = 0
             if readSequence: sequence = self.readSequence
             else: sequence = self.referenceSequence
-            while i < len(sequence):
-                fastaStringForWriting += sequence[i:i+50] + '\n'
-                i += 50
-            return fastaStringForWriting
+            sequenceLines = [sequence[i:i+50] + '\n' for i in range(0, len(sequence), 50)]
+            return f">{self.chromosome}:{self.startPos}-{self.endPos}({self.strand})\n" + ''.join(sequenceLines)
 
 
         def formatForBedOutput(self):
@@ -113,26 +133,32 @@ class SamFileIterator:
 
 
     # Initialize the SamFileIterator with an open sam file object.
-    def __init__(self, samFile: IO, skipHeaders = True, skipUnaligned = False, skipIndels = False):
+    def __init__(self, samFile: IO, skipHeaders = True, skipUnaligned = False, skipIndels = False,
+                 reverseComplimentMinusStrand = True):
         """
         Takes an open file IO object. Headers can be skipped if desired (True by default).
+        If reverseComplimentMinusStrand is False, the sequences for reads on the '-' strand are left as they appear in the
+        sam file (i.e. relative to the '+' strand of the reference), which saves some work if they aren't needed.
         """
 
         self.samFile = samFile # The file that will be parsed and read through.
         self.skipHeaders = skipHeaders # Whether or not to skip the initial header lines (lines preceded by '@')
         self.skipUnaligned = skipUnaligned # Whether or not to skip reads that didn't align to the reference genome.
         self.skipIndels = skipIndels # Whether or not to skip reads that aligned with insertions or deletions.
+        self.reverseComplimentMinusStrand = reverseComplimentMinusStrand # Whether or not to reverse compliment the
+                                                                         # sequences of reads on the '-' strand.
 
 
-    # Reads in the next same read (or header) and returns it.
+    # Parses the current sam read (or header) and returns it, or returns None if it should be skipped.
     def parseRead(self):
 
         # Determine if this is a header line. If it is, return/skip as necessary.
         if self.thisRead.startswith('@'):
-            if self.skipHeaders: return self.__next__()
+            if self.skipHeaders: return None
             else: return self.SamHeader(self.thisRead.strip())
 
-        splitLine = self.thisRead.split()
+        # Split off the 11 mandatory fields, leaving the optional fields together at the end.
+        splitLine = self.thisRead.rstrip().split(None, 11)
 
         # Retrieve the read name, sequence, and quality string.
         readName = splitLine[0]
@@ -142,25 +168,24 @@ class SamFileIterator:
         # If the read didn't align, we already have all the relevant information.
         # Create the SamRead object and return it (unless skipping unaligned reads)!
         if splitLine[5] == '*': 
-            if self.skipUnaligned: return self.__next__()
+            if self.skipUnaligned: return None
             else: return self.SamRead(readName, readSequence, qualityString)
 
-        # Find the XM and MD fields and derive information about mismatches from them.
-        if splitLine[13].startswith("XM"):
-            mismatchCount = int(splitLine[13].rsplit(':',1)[1])
-            assert splitLine[17].startswith("MD"), f"MD field not found at expected location:\n{self.thisRead}"
-            mismatchDesignations = splitLine[17].rsplit(':',1)[1]
-
-        elif splitLine[14].startswith("XM"): 
-            mismatchCount = int(splitLine[14].rsplit(':',1)[1])
-            assert splitLine[18].startswith("MD"), f"MD field not found at expected location:\n{self.thisRead}"
-            mismatchDesignations = splitLine[18].rsplit(':',1)[1]
-
-        else: raise ValueError(f"XM field not at expected position:\n{self.thisRead}")
-
         # Get the cigar string.
         cigarString = splitLine[5]
 
+        # If there are indels, check whether those are even allowed, skipping if not.
+        if self.skipIndels and ('I' in cigarString or 'D' in cigarString): return None
+
+        # Find the XM and MD fields and derive information about mismatches from them.
+        if len(splitLine) > 11: optionalFields = splitLine[11]
+        else: optionalFields = ''
+        mismatchCount = getOptionalFieldValue(optionalFields, "XM:i:")
+        if mismatchCount is None: raise ValueError(f"XM field not found:\n{self.thisRead}")
+        mismatchCount = int(mismatchCount)
+        mismatchDesignations = getOptionalFieldValue(optionalFields, "MD:Z:")
+        assert mismatchDesignations is not None, f"MD field not found:\n{self.thisRead}"
+
         # Determine if the read sequence should actually be the reverse complement.
         readSequence = splitLine[9]
         isReverseCompliment = bool(int(splitLine[1]) & 0b10000)
@@ -171,13 +196,10 @@ class SamFileIterator:
         chromosome = splitLine[2]
         startPos = int(splitLine[3]) - 1
 
-        # If there are indels, check whether those are even allowed, skipping if not.
-        if self.skipIndels and ('I' in cigarString or 'D' in cigarString): return self.__next__()
-
         # If there are no mismatches and no indels, we skip the next steps (which are icky anyway) and just
         # write the read/reference as is!
         if mismatchCount == 0 and not ('I' in cigarString or 'D' in cigarString):
-            if isReverseCompliment: readSequence = reverseCompliment(readSequence)
+            if isReverseCompliment and self.reverseComplimentMinusStrand: readSequence = reverseCompliment(readSequence)
             return self.SamRead(readName, readSequence, qualityString, readSequence,
                                 [chromosome, startPos, startPos + len(readSequence), strand],
                                 readSequence, readSequence)
@@ -187,15 +209,13 @@ class SamFileIterator:
         readAlignmentPieces = list()
         referenceAlignmentPieces = list()
         readPos = 0
-        mdi = 0 # mismatch designation index
+        mismatchDesignationTokens = mismatchDesignationsTokenizer.findall(mismatchDesignations)
+        mdi = 0 # mismatch designation token index
         leftoverMatches = 0
 
         # Break the cigar string up into its individual components (number-alpha pairs) than loop through them.
-        cigarAlphaPositions = [i for i,char in enumerate(cigarString) if char.isalpha()]
-        lastCigarAlphaPosition = -1
-        for cigarAlphaPosition in cigarAlphaPositions:
-            cigarNumber = int(cigarString[lastCigarAlphaPosition+1:cigarAlphaPosition])
-            cigarAlpha = cigarString[cigarAlphaPosition]
+        for cigarNumber, cigarAlpha in cigarTokenizer.findall(cigarString):
+            cigarNumber = int(cigarNumber)
 
             # If the cigar position is an 'M', use the mismatch designations string to find the 
             # relevant matches/mismatches.
@@ -209,9 +229,9 @@ class SamFileIterator:
 
                     # If there are no matches leftover from a previous M value, see if the next entry in the mismatch
                     # designations string is an alpha (mismatched nucleotide) character. If so, parse it accordingly.
-                    if leftoverMatches == 0 and mismatchDesignations[mdi].isalpha():
+                    if leftoverMatches == 0 and mismatchDesignationTokens[mdi].isalpha():
                         readAlignmentPieces.append(readSequence[readPos])
-                        referenceAlignmentPieces.append(mismatchDesignations[mdi].lower())
+                        referenceAlignmentPieces.append(mismatchDesignationTokens[mdi].lower())
                         readPos += 1
                         mdi += 1
                         remainingMs -= 1
@@ -220,11 +240,8 @@ class SamFileIterator:
                     # designations string wasn't an alpha, it must be a number of matches. Parse accordingly, and 
                     # set this value as the number of leftover matches.
                     elif leftoverMatches == 0:
-                        matchNumberString = ''
-                        while mismatchDesignations[mdi:mdi+1].isnumeric():
-                            matchNumberString += mismatchDesignations[mdi]
-                            mdi += 1
-                        leftoverMatches = int(matchNumberString)
+                        leftoverMatches = int(mismatchDesignationTokens[mdi])
+                        mdi += 1
 
                     # If we do have matches leftover and they meet or exceed the remaining M value, we
                     # can use the read sequence to get the remaining nucleotides for both alignments.
@@ -254,13 +271,12 @@ class SamFileIterator:
             # If the cigar position is an "M", add gaps to the read alignment and use the mismatch designations
             # string to find the bases to add to the reference alignment.
             elif cigarAlpha == 'D':
-                if mismatchDesignations[mdi] == '0': mdi += 1 # WHY, sam files, WHY?!
-                assert mismatchDesignations[mdi] == '^'
-                referenceAlignmentPieces.append(mismatchDesignations[mdi+1:mdi+cigarNumber+1])
+                if mismatchDesignationTokens[mdi] == '0': mdi += 1 # WHY, sam files, WHY?!
+                assert mismatchDesignationTokens[mdi].startswith('^')
+                referenceAlignmentPieces.append(mismatchDesignationTokens[mdi][1:])
                 readAlignmentPieces.append('-'*cigarNumber)
-                mdi += cigarNumber + 1
+                mdi += 1
             else: raise ValueError(f"Unexpected cigar string character {cigarAlpha} in {cigarString}")
-            lastCigarAlphaPosition = cigarAlphaPosition
 
         # Piece together the alignment sequences and derive the reference sequence from its alignment sequence.
         readAlignmentSequence = ''.join(readAlignmentPieces)
@@ -268,7 +284,7 @@ class SamFileIterator:
         referenceSequence = referenceAlignmentSequence.replace('-', '').upper()
 
         # Transform sequences if the actual read sequence is the reverse complement.
-        if isReverseCompliment:
+        if isReverseCompliment and self.reverseComplimentMinusStrand:
             readSequence = reverseCompliment(readSequence)
             referenceSequence = reverseCompliment(referenceSequence)
             # The alignment sequences need to use a translator that is robust to non-nucleotide characters (gaps).
@@ -286,7 +302,11 @@ class SamFileIterator:
         return self
     def __next__(self):
 
-        # Read in the next line (and make sure a line was actually read in at all)
-        self.thisRead: str = self.samFile.readline()
-        if not self.thisRead: raise StopIteration
-        else: return self.parseRead()
+        # Read in lines until one is parsed that isn't skipped (and make sure a line was actually read in at all)
+        # NOTE: This is a loop rather than a recursive call so that long runs of skipped lines
+        #       (e.g. the headers for a genome with many contigs) don't exceed the recursion limit.
+        while True:
+            self.thisRead: str = self.samFile.readline()
+            if not self.thisRead: raise StopIteration
+            parsedRead = self.parseRead()
+            if parsedRead is not None: return parsedRead